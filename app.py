@@ -1,28 +1,25 @@
 import streamlit as st
 import streamlit_authenticator as stauth
-import yaml
-from yaml.loader import SafeLoader
-from pathlib import Path
-import bcrypt
 from nav import *
-# Path to YAML file
-DB_FILE = Path("db.yaml")
+from user_store import init_user_store, load_credentials, get_user, add_user
+from hash_pool import hash_pool, PoolBusy, route_hasher
+import metrics
 
-# Load YAML data
-def load_db():
-    with open('db.yaml') as file:
-        config = yaml.load(file, Loader=SafeLoader)
-    return config
+# Users live in users.db; db.yaml is imported into it the first time the app starts
+init_user_store()
+# Login checks run on the bcrypt pool like registration hashing
+route_hasher(stauth.Hasher)
+metrics.set_page("app")
 
+# Load user credentials from the in-process cache
+@metrics.timed("load_db")
+def load_db():
+    return load_credentials()
 
-# Save data to YAML
-def save_db(data):
-    with open(DB_FILE, "w") as file:
-        yaml.dump(data, file)
 
-# Hash password
+# Hash password on the shared bcrypt pool; the script thread only waits on the result
 def hash_password(password):
-    return bcrypt.hashpw(password.encode(), bcrypt.gensalt()).decode()
+    return hash_pool.hash_password(password)
 
 # Initialize authenticator
 def init_authenticator():
@@ -33,16 +30,18 @@ def login_redirect():
 
 # User registration
 def register_user(name, username, email, password):
-    db = load_db()
-    if username in db["usernames"]:
+    # Check first so taken names skip the bcrypt cost; the insert itself still rejects races
+    if get_user(username) is not None:
+        st.error("Username already exists!")
+        return False
+    try:
+        password_hash = hash_password(password)
+    except PoolBusy:
+        st.error("Too many registrations right now, please try again in a moment.")
+        return False
+    if not add_user(username, name, email, password_hash):
         st.error("Username already exists!")
         return False
-    db["usernames"][username] = {
-        "name": name,
-        "email": email,
-        "password": hash_password(password),
-    }
-    save_db(db)
     st.success("User registered successfully!")
     login_redirect()
     return True
@@ -73,7 +72,11 @@ def main():
     # Login tab
     with tab2:
         authenticator = init_authenticator()
-        authenticator.login()
+        try:
+            authenticator.login()
+        except PoolBusy:
+            st.error("Too many sign-ins right now, please try again in a moment.")
+            return
 
         if st.session_state["authentication_status"]:
             authenticator.logout()
@@ -0,0 +1,94 @@
+import argparse
+import os
+import sys
+import time
+from pathlib import Path
+
+import pandas as pd
+
+from tax_brackets import FILING_STATUSES, TAX_YEARS
+from tax_calc import OPTIONAL_COLUMNS, REQUIRED_COLUMNS, filing_statuses, score_frame
+
+
+# Problems that would otherwise stop the run part way through or score rows as empty:
+# missing columns, blank or non-numeric required amounts, non-numeric optional amounts and,
+# when brackets are computed, filing statuses the tables do not know. Reads only the columns
+# it checks.
+def check_input(input_path, chunksize=50_000, bracket_year=None, filing_status="Single"):
+    columns = pd.read_csv(input_path, nrows=0).columns
+    missing = [column for column in REQUIRED_COLUMNS if column not in columns]
+    if missing:
+        raise ValueError(f"{input_path} is missing required columns: {', '.join(missing)}")
+    optional = [column for column in OPTIONAL_COLUMNS if column in columns]
+    statuses = bracket_year is not None and "filing_status" in columns
+    usecols = REQUIRED_COLUMNS + optional + (["filing_status"] if statuses else [])
+    line = 2  # the header is line 1
+    for chunk in pd.read_csv(input_path, usecols=usecols, chunksize=chunksize, dtype=str, keep_default_na=False):
+        for column in REQUIRED_COLUMNS + optional:
+            cells = chunk[column].str.strip()
+            numbers = pd.to_numeric(cells, errors="coerce")
+            bad = numbers.isna() if column in REQUIRED_COLUMNS else numbers.isna() & (cells != "")
+            if bad.any():
+                row = bad.to_numpy().argmax()
+                raise ValueError(f"{column} on line {line + row} is blank or not a number: {chunk[column].iloc[row]!r}")
+        if statuses:
+            unknown = sorted(set(filing_statuses(chunk["filing_status"], filing_status)) - set(FILING_STATUSES))
+            if unknown:
+                raise ValueError(f"Unknown filing status {unknown[0]!r}; expected one of {', '.join(FILING_STATUSES)}")
+        line += len(chunk)
+
+
+# Streams input_path in chunks and appends each scored chunk to output_path, so memory
+# stays at one chunk whatever the file size. The input is checked before scoring starts,
+# and the output is written to a temporary file that replaces output_path only once every
+# row is scored, so a failed run never leaves a truncated file behind.
+# Returns row count, elapsed time and rows/s.
+def score_csv(input_path, output_path, chunksize=50_000, bracket_year=None, filing_status="Single", keep_columns=True, progress=None):
+    started = time.perf_counter()
+    check_input(input_path, chunksize, bracket_year, filing_status)
+    output_path = Path(output_path)
+    tmp_path = output_path.with_name(f"{output_path.name}.{os.getpid()}.tmp")
+    rows = 0
+    try:
+        with open(tmp_path, "w", newline="") as out:
+            for index, chunk in enumerate(pd.read_csv(input_path, chunksize=chunksize)):
+                scored = score_frame(chunk, bracket_year, filing_status)
+                if keep_columns:
+                    scored = pd.concat([chunk, scored], axis=1)
+                scored.to_csv(out, header=index == 0, index=False)
+                rows += len(chunk)
+                if progress:
+                    progress(rows, time.perf_counter() - started)
+        os.replace(tmp_path, output_path)
+    finally:
+        tmp_path.unlink(missing_ok=True)
+    elapsed = time.perf_counter() - started
+    return {"rows": rows, "seconds": elapsed, "rows_per_second": rows / elapsed if elapsed else 0.0}
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Estimate small-business taxes for every row of a CSV.")
+    parser.add_argument("input", help="CSV with annual_income, tax_rate (percent) and optional deduction, other_tax_credits and filing_status columns")
+    parser.add_argument("output", help="CSV to write the estimates to")
+    parser.add_argument("--chunksize", type=int, default=50_000)
+    parser.add_argument("--bracket-year", type=int, choices=TAX_YEARS, help="also compute progressive bracket tax for this year")
+    parser.add_argument("--filing-status", choices=FILING_STATUSES, default="Single", help="used when the input has no filing_status column and for rows where it is blank")
+    parser.add_argument("--results-only", action="store_true", help="write only the computed columns")
+    parser.add_argument("--quiet", action="store_true")
+    args = parser.parse_args(argv)
+
+    def progress(rows, elapsed):
+        print(f"{rows:,} rows, {rows / elapsed:,.0f} rows/s", file=sys.stderr)
+
+    try:
+        stats = score_csv(
+            args.input, args.output, args.chunksize, args.bracket_year, args.filing_status,
+            keep_columns=not args.results_only, progress=None if args.quiet else progress,
+        )
+    except ValueError as e:
+        parser.exit(1, f"error: {e}\n")
+    print(f"Scored {stats['rows']:,} rows in {stats['seconds']:.2f}s ({stats['rows_per_second']:,.0f} rows/s)", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
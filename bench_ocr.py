@@ -0,0 +1,68 @@
+import argparse
+import os
+import statistics
+import sys
+import time
+from pathlib import Path
+
+from ocr_engine import ocr_pool
+from w2_extract import FIELDS, FULL_PAGE_DPI, ROI_DPI, TEMPLATES, crop_regions, extract_full_page, extract_text_layer, extract_w2, rasterize_page
+
+
+# Wall time plus CPU of this process and of the pdftoppm/tesseract children it waited for
+def measure(run, repeat):
+    walls, cpus, result = [], [], None
+    for _ in range(repeat):
+        before, wall = os.times(), time.perf_counter()
+        result = run()
+        after, wall = os.times(), time.perf_counter() - wall
+        cpu = sum(after[i] - before[i] for i in range(4))
+        walls.append(wall * 1000)
+        cpus.append(cpu * 1000)
+    return statistics.median(walls), statistics.median(cpus), result
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Compare full-page OCR, text-layer parsing and region-of-interest OCR on a W-2 PDF.")
+    parser.add_argument("pdf", nargs="?", default="temp_w2.pdf")
+    parser.add_argument("--template", default="sample_report", choices=sorted(TEMPLATES))
+    parser.add_argument("--dpi", type=int, nargs="+", default=[ROI_DPI], help="ROI DPIs to try (default %(default)s)")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--expect", nargs="+", default=[], metavar="FIELD=AMOUNT", help="amounts printed on the form; any ROI-only run that reads a box differently fails")
+    parser.add_argument("--save-crops", metavar="DIR", help="write each template box as cropped at the first --dpi, to check the coordinates by eye")
+    args = parser.parse_args(argv)
+    expected = {}
+    for item in args.expect:
+        field, _, amount = item.partition("=")
+        if field not in FIELDS or not amount:
+            parser.error(f"--expect takes FIELD=AMOUNT with FIELD one of {', '.join(FIELDS)}")
+        expected[field] = float(amount.replace(",", ""))
+
+    pdf_data = Path(args.pdf).read_bytes()
+    if args.save_crops:
+        Path(args.save_crops).mkdir(parents=True, exist_ok=True)
+        for field, crop in crop_regions(rasterize_page(pdf_data, args.dpi[0]), TEMPLATES[args.template]).items():
+            crop.save(Path(args.save_crops) / f"{args.template}-{field}.png")
+    runs = [(f"full page, color, {FULL_PAGE_DPI} dpi", lambda: (extract_full_page(pdf_data, FULL_PAGE_DPI, gray=False), "full_page"))]
+    runs.append(("text layer", lambda: (extract_text_layer(pdf_data) or {}, "text_layer")))
+    for dpi in args.dpi:
+        runs.append((f"roi only, gray, {dpi} dpi", lambda dpi=dpi: extract_w2(pdf_data, args.template, dpi, fallback=False)))
+        runs.append((f"roi + fallback, gray, {dpi} dpi", lambda dpi=dpi: extract_w2(pdf_data, args.template, dpi)))
+
+    baseline_cpu = None
+    mismatches = []
+    for label, run in runs:
+        wall, cpu, (values, method) = measure(run, args.repeat)
+        baseline_cpu = baseline_cpu or cpu
+        found = {field: value for field, value in values.items() if value}
+        print(f"{label:<32} wall {wall:>8.1f} ms  cpu {cpu:>8.1f} ms  ({baseline_cpu / cpu if cpu else float('inf'):>5.1f}x)  {method:<14} {found}")
+        if label.startswith("roi only"):
+            mismatches += [f"{label} {field}: read {values.get(field)}, expected {amount}" for field, amount in expected.items() if values.get(field) != amount]
+    print(f"engine pool: {ocr_pool.stats()}")
+    for line in mismatches:
+        print(f"MISMATCH {line}")
+    return 1 if mismatches else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,216 @@
+import argparse
+import json
+import multiprocessing
+import os
+import resource
+import statistics
+import sys
+import time
+import tracemalloc
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import ExitStack
+from pathlib import Path
+from unittest import mock
+
+from streamlit.testing.v1 import AppTest
+
+import model
+from llm_backends import FakeBackend
+from ocr_cache import ocr_cache
+
+SAMPLE_PDF = Path("temp_w2.pdf")
+
+# What OCR would read off a typical W-2; the mock stands in for rasterizing and tesseract
+SAMPLE_W2 = {
+    "wages": 62000.0,
+    "federal_tax_withheld": 6100.0,
+    "social_security_wages": 62000.0,
+    "medicare_wages": 62000.0,
+}
+
+
+class FakeUpload:
+    def __init__(self, data, name="w2.pdf"):
+        self.data = data
+        self.name = name
+
+    def getbuffer(self):
+        return memoryview(self.data)
+
+
+# AppTest has no file upload support, so the W-2 page gets a ready-made upload instead
+def upload_sample(label, *args, **kwargs):
+    return FakeUpload(SAMPLE_PDF.read_bytes() if SAMPLE_PDF.exists() else b"%PDF-1.4 sample")
+
+
+def fake_ocr(key, compute):
+    return dict(SAMPLE_W2), "roi"
+
+
+class FakeClient:
+    pass
+
+
+def mocks():
+    return [
+        mock.patch("streamlit.file_uploader", upload_sample),
+        mock.patch.object(ocr_cache, "get_or_compute", fake_ocr),
+        mock.patch.object(model, "get_cerebras_client", lambda: FakeClient()),
+        mock.patch.object(model, "get_chat_backend", lambda: FakeBackend("bench", chunks=["A", " short", " answer."] * 20, ttft=0.0)),
+    ]
+
+
+# Each scenario is a first load followed by the widget edits a user typically makes;
+# every step is one rerun
+SCENARIOS = {
+    "finance_help.py": [
+        ("load", lambda at: at),
+        ("revenue", lambda at: at.number_input[0].set_value(12000.0)),
+        ("reserve", lambda at: at.number_input[1].set_value(30000.0)),
+        ("expenses", lambda at: at.number_input[3].set_value(5000.0)),
+        ("volatility", lambda at: at.slider[0].set_value(25)),
+        ("gross_profit", lambda at: at.number_input[4].set_value(4000.0)),
+    ],
+    "ml.py": [
+        ("load", lambda at: at),
+        ("savings", lambda at: at.number_input[0].set_value(1500.0)),
+        ("debt", lambda at: at.number_input[1].set_value(400.0)),
+    ],
+    "tax_estimator.py": [
+        ("load", lambda at: at),
+        ("revenue", lambda at: at.number_input[0].set_value(250000.0)),
+        ("deduction", lambda at: at.number_input[3].set_value(12000.0)),
+        ("rate", lambda at: at.slider[0].set_value(21.0)),
+        ("brackets", lambda at: at.checkbox[0].check()),
+    ],
+    "taxfilling.py": [
+        ("load", lambda at: at),
+        ("wages", lambda at: at.number_input[0].set_value(70000.0)),
+        ("dependents", lambda at: at.number_input[4].set_value(2)),
+        ("status", lambda at: at.selectbox[0].select("Married Filing Jointly")),
+    ],
+    "chatbot.py": [
+        ("load", lambda at: at),
+        ("first_turn", lambda at: at.chat_input[0].set_value("How much should I keep in reserve?")),
+        ("follow_up", lambda at: at.chat_input[0].set_value("And for a seasonal business?")),
+    ],
+}
+
+
+# Resident set size right now, from /proc on Linux. Elsewhere this falls back to the
+# process peak (ru_maxrss, KiB on Linux and bytes on macOS), which only ever grows.
+def current_rss_mb():
+    try:
+        with open("/proc/self/statm") as statm:
+            return int(statm.read().split()[1]) * os.sysconf("SC_PAGE_SIZE") / (1024 * 1024)
+    except OSError:
+        rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return rss / (1024 * 1024) if sys.platform == "darwin" else rss / 1024
+
+
+def run_step(at, step, trace_memory):
+    if trace_memory:
+        tracemalloc.reset_peak()
+    rss = current_rss_mb()
+    wall, cpu = time.perf_counter(), time.process_time()
+    step(at).run()
+    wall, cpu = time.perf_counter() - wall, time.process_time() - cpu
+    if at.exception:
+        raise RuntimeError(f"{at.exception[0].message}")
+    after = current_rss_mb()
+    sample = {"wall_ms": wall * 1000, "cpu_ms": cpu * 1000, "rss_mb": after, "rss_delta_mb": after - rss}
+    if trace_memory:
+        sample["alloc_peak_mb"] = tracemalloc.get_traced_memory()[1] / (1024 * 1024)
+    return sample
+
+
+def _p50(samples, field):
+    return round(statistics.median(sample[field] for sample in samples), 2)
+
+
+# The first pass warms process-wide caches (models, stores, imports) and is not counted;
+# the report describes steady-state reruns
+def bench_page(page, repeat=5, trace_memory=False, timeout=60):
+    steps = SCENARIOS[page]
+    samples = {name: [] for name, _ in steps}
+    for iteration in range(repeat + 1):
+        at = AppTest.from_file(page, default_timeout=timeout)
+        for name, step in steps:
+            sample = run_step(at, step, trace_memory)
+            if iteration:
+                samples[name].append(sample)
+    reruns = [sample for values in samples.values() for sample in values]
+    report = {
+        "wall_ms_p50": _p50(reruns, "wall_ms"),
+        "cpu_ms_p50": _p50(reruns, "cpu_ms"),
+        "rss_mb": round(max(sample["rss_mb"] for sample in reruns), 1),
+        "rss_delta_mb_p50": _p50(reruns, "rss_delta_mb"),
+        "steps": {
+            name: {"wall_ms_p50": _p50(values, "wall_ms"), "cpu_ms_p50": _p50(values, "cpu_ms"), "rss_delta_mb_p50": _p50(values, "rss_delta_mb")}
+            for name, values in samples.items()
+        },
+    }
+    if trace_memory:
+        report["alloc_peak_mb"] = round(max(sample["alloc_peak_mb"] for sample in reruns), 1)
+    return report
+
+
+def _bench_in_process(page, repeat, trace_memory):
+    os.environ.setdefault("CEREBRAS_API_KEY", "bench")
+    if trace_memory:
+        tracemalloc.start()
+    with ExitStack() as stack:
+        for patch in mocks():
+            stack.enter_context(patch)
+        return bench_page(page, repeat, trace_memory)
+
+
+# Each page runs in a fresh interpreter, so rss_mb is that page's own footprint rather than
+# whatever the pages benchmarked before it left in the process
+def bench_page_isolated(page, repeat=5, trace_memory=False):
+    with ProcessPoolExecutor(max_workers=1, mp_context=multiprocessing.get_context("spawn")) as pool:
+        return pool.submit(_bench_in_process, page, repeat, trace_memory).result()
+
+
+# rss_mb is the highest resident size seen after a measured rerun of the page
+def compare(report, baseline, threshold, fields=("wall_ms_p50", "cpu_ms_p50", "rss_mb")):
+    regressions = []
+    for page, entry in report.items():
+        before = baseline.get(page)
+        if not before:
+            continue
+        for field in fields:
+            if before.get(field) and entry[field] > before[field] * (1 + threshold):
+                regressions.append(f"{page} {field}: {before[field]:.1f} -> {entry[field]:.1f}")
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark Streamlit page reruns headlessly with AppTest.")
+    parser.add_argument("pages", nargs="*", default=list(SCENARIOS))
+    parser.add_argument("--repeat", type=int, default=5, help="measured passes per page after one warm-up pass")
+    parser.add_argument("--trace-memory", action="store_true", help="also record the Python allocation peak per rerun; slows reruns, so compare only against baselines taken the same way")
+    parser.add_argument("--json", help="write the report to this file")
+    parser.add_argument("--baseline", help="earlier --json report to compare against")
+    parser.add_argument("--threshold", type=float, default=0.25, help="allowed relative slowdown before flagging (default 0.25)")
+    args = parser.parse_args(argv)
+
+    report = {}
+    for page in args.pages:
+        entry = bench_page_isolated(page, args.repeat, args.trace_memory)
+        report[page] = entry
+        print(f"{page:<20} wall {entry['wall_ms_p50']:>8.1f} ms  cpu {entry['cpu_ms_p50']:>8.1f} ms  rss {entry['rss_mb']:>7.1f} MB ({entry['rss_delta_mb_p50']:+.1f} MB/rerun)")
+        for name, step in entry["steps"].items():
+            print(f"  {name:<18} wall {step['wall_ms_p50']:>8.1f} ms  cpu {step['cpu_ms_p50']:>8.1f} ms  rss {step['rss_delta_mb_p50']:>+6.1f} MB")
+    if args.json:
+        Path(args.json).write_text(json.dumps(report, indent=2))
+    if args.baseline:
+        regressions = compare(report, json.loads(Path(args.baseline).read_text()), args.threshold)
+        for line in regressions:
+            print(f"REGRESSION {line}")
+        return 1 if regressions else 0
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
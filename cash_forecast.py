@@ -0,0 +1,34 @@
+from functools import lru_cache
+
+import numpy as np
+import pandas as pd
+
+PERCENTILES = (10, 50, 90)
+
+
+# Simulates `paths` independent 60-month histories in one array operation. Each month's
+# revenue and operating expenses are drawn around their current values with the given
+# relative volatility (floored at zero); debt payments stay fixed. Returns the reserve
+# percentiles per month.
+def simulate_cash_reserve(income, expenses, debt, months=60, paths=2000, revenue_volatility=0.10,
+                          expense_volatility=0.05, seed=42, starting_reserve=0.0, percentiles=PERCENTILES):
+    rng = np.random.default_rng(seed)
+    shocks = rng.standard_normal((2, paths, months))
+    revenue = np.maximum(income * (1 + revenue_volatility * shocks[0]), 0)
+    costs = np.maximum(expenses * (1 + expense_volatility * shocks[1]), 0)
+    reserve = starting_reserve + np.cumsum(revenue - costs - debt, axis=1)
+    bands = np.percentile(reserve, percentiles, axis=0)
+    return pd.DataFrame(
+        bands.T,
+        index=pd.Index(np.arange(1, months + 1), name="Month"),
+        columns=[f"P{p}" for p in percentiles],
+    )
+
+
+# Slider changes often revisit earlier inputs, so keep recent results. The frame is
+# shared between callers and must not be modified.
+@lru_cache(maxsize=256)
+def cached_forecast(income, expenses, debt, months=60, paths=2000, revenue_volatility=0.10,
+                    expense_volatility=0.05, seed=42, starting_reserve=0.0):
+    return simulate_cash_reserve(income, expenses, debt, months, paths, revenue_volatility,
+                                 expense_volatility, seed, starting_reserve)
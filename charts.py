@@ -0,0 +1,71 @@
+import hashlib
+import io
+import threading
+from collections import OrderedDict
+
+import numpy as np
+import pandas as pd
+import streamlit as st
+
+from lazy_imports import lazy_import
+
+# matplotlib loads on the first cache miss; cached charts never need it
+mpl_figure = lazy_import("matplotlib.figure")
+
+MAX_CHARTS = 256
+
+_rendered = OrderedDict()
+_lock = threading.Lock()
+_stats = {"hits": 0, "misses": 0}
+
+
+def data_key(*parts):
+    digest = hashlib.sha256()
+    for part in parts:
+        if isinstance(part, (pd.DataFrame, pd.Series)):
+            digest.update(pd.util.hash_pandas_object(part, index=True).to_numpy().tobytes())
+            digest.update(repr(list(getattr(part, "columns", [part.name]))).encode())
+        elif isinstance(part, np.ndarray):
+            digest.update(part.tobytes())
+            digest.update(repr((part.dtype, part.shape)).encode())
+        else:
+            digest.update(repr(part).encode())
+        digest.update(b"|")
+    return digest.hexdigest()
+
+
+# Renders a matplotlib chart to PNG once per distinct input and serves the bytes afterwards.
+# Figures are built with matplotlib.figure.Figure, which never joins pyplot's global figure
+# manager, and are cleared right after rendering, so nothing accumulates across reruns.
+def render_png(key, draw, figsize=None):
+    with _lock:
+        png = _rendered.get(key)
+        if png is not None:
+            _rendered.move_to_end(key)
+            _stats["hits"] += 1
+            return png
+        _stats["misses"] += 1
+    fig = mpl_figure.Figure(figsize=figsize)
+    try:
+        draw(fig.subplots())
+        buffer = io.BytesIO()
+        fig.savefig(buffer, format="png", bbox_inches="tight")
+        png = buffer.getvalue()
+    finally:
+        fig.clear()
+    with _lock:
+        _rendered[key] = png
+        while len(_rendered) > MAX_CHARTS:
+            _rendered.popitem(last=False)
+    return png
+
+
+# Drop-in for `fig, ax = plt.subplots(); ...; st.pyplot(fig)`: draw(ax) only runs when the
+# data behind the chart changed. `name` keeps different charts over equal data apart.
+def cached_pyplot(name, data, draw, figsize=None):
+    st.image(render_png(data_key(name, *data), draw, figsize), use_container_width=True)
+
+
+def chart_stats():
+    with _lock:
+        return {"charts": len(_rendered), **_stats}
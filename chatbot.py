@@ -1,22 +1,34 @@
 import streamlit as st
 from model import *
+import metrics
+
+metrics.set_page("chatbot")
 st.title("Financial Helper Chatbot")
 
-cb = CerebrasChatbot()
+CHAT_DEADLINE = 60
 
 if "messages" not in st.session_state:
     st.session_state.messages = []
+if "context" not in st.session_state:
+    st.session_state.context = ContextWindow(llm_summarizer(get_cerebras_client()), budget=3000)
+
+# A new run means the previous one is gone; stop anything it was still streaming
+if st.session_state.get("active_chat") is not None:
+    st.session_state.active_chat.cancel()
+
+# The client is shared process-wide; the history and its summary are this session's own
+cb = CerebrasChatbot(messages=st.session_state.messages, context=st.session_state.context, backend=get_chat_backend())
+st.session_state.active_chat = cb
 
 for message in st.session_state.messages:
     with st.chat_message(message["role"]):
         st.markdown(message["content"])
 
 if prompt := st.chat_input("What is up?"):
-    st.session_state.messages.append({"role": "user", "content": prompt})
     with st.chat_message("user"):
         st.markdown(prompt)
 
     with st.chat_message("assistant"):
-        stream = cb.prompt(prompt)
-        response = st.write_stream(stream)
-    st.session_state.messages.append({"role": "assistant", "content": response})
\ No newline at end of file
+        # prompt() records both the question and the answer in st.session_state.messages
+        stream = cb.prompt(prompt, deadline=CHAT_DEADLINE)
+        st.write_stream(stream)
\ No newline at end of file
@@ -0,0 +1,124 @@
+import re
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+# Rough token estimate: one token per word or punctuation mark plus a few per message for
+# the chat template. Close enough for budgeting without shipping a tokenizer.
+TOKEN_PATTERN = re.compile(r"\w+|[^\w\s]")
+MESSAGE_OVERHEAD = 4
+
+# Summaries are generated off the request path. The pool is shared by all sessions, and
+# each conversation has at most one summary in flight.
+_summary_executor = ThreadPoolExecutor(max_workers=2, thread_name_prefix="summarize")
+
+
+def count_tokens(text):
+    return len(TOKEN_PATTERN.findall(text))
+
+
+def message_tokens(message):
+    return count_tokens(message["content"]) + MESSAGE_OVERHEAD
+
+
+def transcript(messages):
+    return "\n".join(f"{message['role']}: {message['content']}" for message in messages)
+
+
+# Summarizer backed by any client with the chat.completions.create interface
+def llm_summarizer(client, model="llama3.1-8b", max_tokens=256):
+    def summarize(previous_summary, messages):
+        text = transcript(messages)
+        if previous_summary:
+            text = f"Summary so far:\n{previous_summary}\n\nNew turns:\n{text}"
+        response = client.chat.completions.create(
+            messages=[
+                {"role": "system", "content": "Condense this conversation into a short summary that keeps every fact, number and decision the assistant may need later."},
+                {"role": "user", "content": text},
+            ],
+            model=model,
+            max_tokens=max_tokens,
+        )
+        return response.choices[0].message.content or ""
+    return summarize
+
+
+def _summary_message(summary):
+    return {"role": "system", "content": f"Summary of the earlier conversation: {summary}"}
+
+
+# Keeps the prompt inside a token budget: the newest turns are sent verbatim and everything
+# older is represented by a running summary. After each turn, the turns that would not fit
+# next to the next question are folded into the summary in the background, so the next
+# request does not wait; reserve tokens are kept free for that question and for the summary
+# growing as it takes the turns in. A turn is only dropped from the prompt once the summary
+# covers it; while a summary is still in flight the prompt may run over the budget rather
+# than lose those turns.
+class ContextWindow:
+    def __init__(self, summarize, budget=3000, min_recent=2, reserve=512, executor=_summary_executor):
+        self.summarize = summarize
+        self.budget = budget
+        self.min_recent = min_recent
+        self.reserve = min(reserve, budget // 2)
+        self.executor = executor
+        self.summary = ""
+        self.summarized = 0
+        self.pending = None
+        self.lock = threading.Lock()
+
+    def _collect(self):
+        with self.lock:
+            pending = self.pending
+        if pending is None or not pending.done():
+            return
+        with self.lock:
+            self.pending = None
+        try:
+            summary, upto = pending.result()
+        except Exception:
+            # Keep the old summary; the same turns are retried after the next turn
+            return
+        with self.lock:
+            self.summary = summary
+            self.summarized = upto
+
+    # First message that still fits in budget tokens, counting back from the newest
+    def _window_start(self, messages, budget):
+        with self.lock:
+            start = self.summarized
+            summary = self.summary
+        used = message_tokens(_summary_message(summary)) if summary else 0
+        cut = len(messages)
+        for index in range(len(messages) - 1, start - 1, -1):
+            cost = message_tokens(messages[index])
+            if len(messages) - index > self.min_recent and used + cost > budget:
+                break
+            used += cost
+            cut = index
+        return cut
+
+    # Everything the summary does not cover yet goes out verbatim; after_turn has already
+    # summarized far enough ahead that this fits the budget once the summary lands
+    def build(self, messages):
+        self._collect()
+        with self.lock:
+            summary = self.summary
+            start = self.summarized
+        context = [_summary_message(summary)] if summary else []
+        return context + list(messages[start:])
+
+    def after_turn(self, messages):
+        self._collect()
+        cut = self._window_start(messages, self.budget - self.reserve)
+        with self.lock:
+            if self.pending is not None or cut <= self.summarized:
+                return
+            older = list(messages[self.summarized:cut])
+            previous = self.summary
+            self.pending = self.executor.submit(lambda: (self.summarize(previous, older), cut))
+
+    def wait(self, timeout=None):
+        with self.lock:
+            pending = self.pending
+        if pending is not None:
+            pending.exception(timeout=timeout)
+        self._collect()
@@ -1,7 +1,16 @@
 import streamlit as st
 import numpy as np
 import pandas as pd
-import matplotlib.pyplot as plt
+import altair as alt
+from finance_metrics import MESSAGES, compute_metrics
+from cash_forecast import cached_forecast
+from charts import cached_pyplot
+from fragments import PageTimer, timed_fragment
+import metrics
+
+# Fragment timings are labelled with the session's page, so name it before any fragment runs
+metrics.set_page("finance_help")
+page_timer = PageTimer("finance_help")
 
 # # Set page configuration
 # st.set_page_config(page_title="Small Business Financial Wellness App", layout="centered")
@@ -29,12 +38,18 @@ with col2:
     debt = st.number_input("Monthly Debt Payments ($)", min_value=0.0, format="%.2f", help="Total monthly payments towards business debt.")
     expenses = st.number_input("Monthly Operating Expenses ($)", min_value=0.0, format="%.2f", help="Total monthly business operating costs.")
 
-# Key Metrics Calculation with Edge Handling
-debt_to_income_ratio = (debt / income * 100) if income > 0 else 0
-savings_rate = (savings / (income * 12) * 100) if income > 0 else 0
+# Key Metrics Calculation with Edge Handling (shared with batch workloads via finance_metrics)
+row = compute_metrics(income, savings, debt, expenses).iloc[0]
+debt_to_income_ratio = row["debt_to_income_ratio"]
+savings_rate = row["savings_rate"]
+emergency_fund_months = row["emergency_fund_months"]
+
+LEVEL_BOXES = {"good": st.success, "moderate": st.warning, "poor": st.error}
 
-# Emergency Fund Calculation
-emergency_fund_months = (savings / expenses) if expenses > 0 else float('inf') if savings > 0 else 0
+# The level comes from compute_metrics' *_level column, the same classification batch callers get
+def show_level(row, metric):
+    metric_level = row[f"{metric}_level"]
+    LEVEL_BOXES[metric_level](MESSAGES[metric][metric_level])
 
 # Display Financial Summary in Columns
 st.header("Financial Health Overview")
@@ -45,23 +60,13 @@ col3, col4, col5 = st.columns(3)
 with col3:
     st.subheader("Debt-to-Income Ratio")
     st.write(f"**{debt_to_income_ratio:.2f}%**")
-    if debt_to_income_ratio < 15:
-        st.success("Healthy debt-to-income ratio.")
-    elif 15 <= debt_to_income_ratio <= 36:
-        st.warning("Moderate debt-to-income ratio.")
-    else:
-        st.error("High debt-to-income ratio.")
+    show_level(row, "debt_to_income_ratio")
 
 # Savings Rate
 with col4:
     st.subheader("Savings Rate")
     st.write(f"**{savings_rate:.2f}%**")
-    if savings_rate >= 20:
-        st.success("Good savings reserve.")
-    elif 10 <= savings_rate < 20:
-        st.warning("Moderate savings reserve.")
-    else:
-        st.error("Low savings rate.")
+    show_level(row, "savings_rate")
 
 # Emergency Fund
 with col5:
@@ -71,12 +76,7 @@ with col5:
         st.success("Excellent emergency fund!")
     else:
         st.write(f"**{emergency_fund_months:.2f} months**")
-        if emergency_fund_months >= 6:
-            st.success("Solid emergency fund.")
-        elif 3 <= emergency_fund_months < 6:
-            st.warning("Consider increasing emergency reserves.")
-        else:
-            st.error("Low emergency reserves.")
+        show_level(row, "emergency_fund_months")
 
 # Revenue and Expense Breakdown
 st.header("Financial Visualizations")
@@ -87,10 +87,10 @@ remaining_income = max(income - (debt + expenses), 0)
 allocation = np.array([debt, expenses, remaining_income])
 labels = ['Debt Payments', 'Operating Expenses', 'Remaining Income']
 if allocation.sum() > 0:
-    fig, ax = plt.subplots()
-    ax.pie(allocation, labels=labels, autopct='%1.1f%%', startangle=90)
-    ax.axis('equal')
-    st.pyplot(fig)
+    def draw_allocation(ax):
+        ax.pie(allocation, labels=labels, autopct='%1.1f%%', startangle=90)
+        ax.axis('equal')
+    cached_pyplot("revenue_allocation", (allocation,), draw_allocation)
 else:
     st.write("No income allocation data to display.")
 
@@ -105,83 +105,101 @@ if monthly_savings > 0:
 else:
     st.write("No cash reserve data to display.")
 
+# The sections below are fragments: their own widgets rerun only that section, with the
+# page inputs passed in as arguments. Editing the inputs above still reruns everything.
+
 # Cash Flow Forecasting for 5 Years
-st.subheader("Projected Cash Reserve Growth (5 Years)")
-months = np.arange(1, 61)
-projected_savings = np.cumsum(np.full_like(months, monthly_savings))
-if monthly_savings > 0:
-    growth_df = pd.DataFrame({'Month': months, 'Projected Savings ($)': projected_savings})
-    st.line_chart(growth_df.set_index('Month'))
-else:
-    st.write("No projected growth data to display.")
+@timed_fragment("forecast")
+def forecast_section(income, expenses, debt):
+    st.subheader("Projected Cash Reserve Growth (5 Years)")
+    if income > 0:
+        vol_col1, vol_col2 = st.columns(2)
+        with vol_col1:
+            revenue_volatility = st.slider("Monthly Revenue Volatility (%)", min_value=0, max_value=50, value=10, help="How much monthly revenue typically swings around its current level.")
+        with vol_col2:
+            expense_volatility = st.slider("Monthly Expense Volatility (%)", min_value=0, max_value=50, value=5, help="How much monthly operating expenses typically swing.")
+        # 2,000 simulated paths; results are cached per input tuple, so revisiting settings is instant
+        forecast = cached_forecast(float(income), float(expenses), float(debt),
+                                   revenue_volatility=revenue_volatility / 100, expense_volatility=expense_volatility / 100)
+        band = alt.Chart(forecast.reset_index()).mark_area(opacity=0.3).encode(
+            x=alt.X("Month:Q"),
+            y=alt.Y("P10:Q", title="Projected Savings ($)"),
+            y2="P90:Q",
+        )
+        median = alt.Chart(forecast.reset_index()).mark_line().encode(x="Month:Q", y="P50:Q")
+        st.altair_chart(band + median, use_container_width=True)
+        st.caption("Line: median path. Shaded band: 10th to 90th percentile of simulated outcomes.")
+    else:
+        st.write("No projected growth data to display.")
+
+forecast_section(income, expenses, debt)
 
 # Financial Ratios Section
-st.header("Advanced Financial Ratios")
-
-col6, col7 = st.columns(2)
-with col6:
-    st.subheader("Gross Profit Margin")
-    gross_profit = st.number_input("Gross Profit ($)", min_value=0.0, format="%.2f", help="Your total profit after cost of goods sold.")
-    gross_profit_margin = (gross_profit / income * 100) if income > 0 else 0
-    st.write(f"**{gross_profit_margin:.2f}%**")
-    if gross_profit_margin > 50:
-        st.success("Excellent profit margin.")
-    elif 20 <= gross_profit_margin <= 50:
-        st.warning("Average profit margin.")
-    else:
-        st.error("Low profit margin.")
-
-with col7:
-    st.subheader("Net Profit Margin")
-    net_profit = income - expenses - debt
-    net_profit_margin = (net_profit / income * 100) if income > 0 else 0
-    st.write(f"**{net_profit_margin:.2f}%**")
-    if net_profit_margin > 15:
-        st.success("Healthy net profit margin.")
-    elif 5 <= net_profit_margin <= 15:
-        st.warning("Moderate net profit margin.")
-    else:
-        st.error("Low net profit margin.")
+@timed_fragment("ratios")
+def ratios_section(income, savings, debt, expenses):
+    st.header("Advanced Financial Ratios")
+
+    col6, col7 = st.columns(2)
+    with col6:
+        st.subheader("Gross Profit Margin")
+        gross_profit = st.number_input("Gross Profit ($)", min_value=0.0, format="%.2f", help="Your total profit after cost of goods sold.")
+    ratios = compute_metrics(income, savings, debt, expenses, gross_profit).iloc[0]
+    with col6:
+        st.write(f"**{ratios['gross_profit_margin']:.2f}%**")
+        show_level(ratios, "gross_profit_margin")
+
+    with col7:
+        st.subheader("Net Profit Margin")
+        st.write(f"**{ratios['net_profit_margin']:.2f}%**")
+        show_level(ratios, "net_profit_margin")
+
+ratios_section(income, savings, debt, expenses)
 
 # Goal Setting Section
-st.header("Set Financial Goals")
+@timed_fragment("goals")
+def goals_section(income, savings):
+    st.header("Set Financial Goals")
 
-# Set financial goals only if valid ranges are available
-revenue_goal_max = int(income * 12 * 2) if income > 0 else 0
-cash_goal_max = int(savings * 2) if savings > 0 else 0
+    # Set financial goals only if valid ranges are available
+    revenue_goal_max = int(income * 12 * 2) if income > 0 else 0
+    cash_goal_max = int(savings * 2) if savings > 0 else 0
 
-if revenue_goal_max > 0:
-    revenue_goal = st.slider("Annual Revenue Goal ($)", min_value=0, max_value=revenue_goal_max, 
-                             value=int(income * 12 * 1.5), help="Set your target for annual revenue.")
-else:
-    st.write("No revenue goal data to display.")
+    if revenue_goal_max > 0:
+        revenue_goal = st.slider("Annual Revenue Goal ($)", min_value=0, max_value=revenue_goal_max, 
+                                 value=int(income * 12 * 1.5), help="Set your target for annual revenue.")
+    else:
+        st.write("No revenue goal data to display.")
 
-if cash_goal_max > 0:
-    cash_goal = st.slider("Target Cash Reserve ($)", min_value=0, max_value=cash_goal_max, 
-                          value=int(savings * 1.5), help="Set a target cash reserve for your emergency fund.")
-else:
-    st.write("No cash reserve goal data to display.")
+    if cash_goal_max > 0:
+        cash_goal = st.slider("Target Cash Reserve ($)", min_value=0, max_value=cash_goal_max, 
+                              value=int(savings * 1.5), help="Set a target cash reserve for your emergency fund.")
+    else:
+        st.write("No cash reserve goal data to display.")
 
-# Progress Towards Goals
-st.subheader("Progress Towards Goals")
+    # Progress Towards Goals
+    st.subheader("Progress Towards Goals")
 
-# Projected Annual Revenue Calculation
-annual_revenue_projection = income * 12
-if revenue_goal_max > 0:
-    st.write(f"Projected Annual Revenue: **${annual_revenue_projection:,.2f}**")
-    if annual_revenue_projection >= revenue_goal:
-        st.success("On track to meet revenue goal!")
+    # Projected Annual Revenue Calculation
+    annual_revenue_projection = income * 12
+    if revenue_goal_max > 0:
+        st.write(f"Projected Annual Revenue: **${annual_revenue_projection:,.2f}**")
+        if annual_revenue_projection >= revenue_goal:
+            st.success("On track to meet revenue goal!")
+        else:
+            st.warning(f"Additional revenue needed to meet goal: ${revenue_goal - annual_revenue_projection:,.2f}")
     else:
-        st.warning(f"Additional revenue needed to meet goal: ${revenue_goal - annual_revenue_projection:,.2f}")
-else:
-    st.write("No revenue projection data to display.")
+        st.write("No revenue projection data to display.")
 
-# Cash Reserve Goal Calculation
-if cash_goal_max > 0:
-    st.write(f"Projected Cash Reserve: **${savings:,.2f}**")
-    if savings >= cash_goal:
-        st.success("Cash reserve goal achieved!")
+    # Cash Reserve Goal Calculation
+    if cash_goal_max > 0:
+        st.write(f"Projected Cash Reserve: **${savings:,.2f}**")
+        if savings >= cash_goal:
+            st.success("Cash reserve goal achieved!")
+        else:
+            st.warning(f"Additional savings needed to meet goal: ${cash_goal - savings:,.2f}")
     else:
-        st.warning(f"Additional savings needed to meet goal: ${cash_goal - savings:,.2f}")
-else:
-    st.write("No cash reserve projection data to display.")
+        st.write("No cash reserve projection data to display.")
+
+goals_section(income, savings)
+
+page_timer.finish()
@@ -0,0 +1,91 @@
+import numpy as np
+import pandas as pd
+
+LEVELS = ["good", "moderate", "poor"]
+
+# Traffic-light bands from the Finance Help page: (good test, moderate test) per metric;
+# anything else is poor
+THRESHOLDS = {
+    "debt_to_income_ratio": (lambda x: x < 15, lambda x: (x >= 15) & (x <= 36)),
+    "savings_rate": (lambda x: x >= 20, lambda x: (x >= 10) & (x < 20)),
+    "emergency_fund_months": (lambda x: x >= 6, lambda x: (x >= 3) & (x < 6)),
+    "gross_profit_margin": (lambda x: x > 50, lambda x: (x >= 20) & (x <= 50)),
+    "net_profit_margin": (lambda x: x > 15, lambda x: (x >= 5) & (x <= 15)),
+}
+
+# What the page says for each level
+MESSAGES = {
+    "debt_to_income_ratio": {"good": "Healthy debt-to-income ratio.", "moderate": "Moderate debt-to-income ratio.", "poor": "High debt-to-income ratio."},
+    "savings_rate": {"good": "Good savings reserve.", "moderate": "Moderate savings reserve.", "poor": "Low savings rate."},
+    "emergency_fund_months": {"good": "Solid emergency fund.", "moderate": "Consider increasing emergency reserves.", "poor": "Low emergency reserves."},
+    "gross_profit_margin": {"good": "Excellent profit margin.", "moderate": "Average profit margin.", "poor": "Low profit margin."},
+    "net_profit_margin": {"good": "Healthy net profit margin.", "moderate": "Moderate net profit margin.", "poor": "Low net profit margin."},
+}
+
+
+def _array(values):
+    return np.asarray(values, dtype=float)
+
+
+def _percent_of(part, whole):
+    part, whole = _array(part), _array(whole)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        return np.where(whole > 0, part / whole * 100, 0.0)
+
+
+def debt_to_income_ratio(debt, income):
+    return _percent_of(debt, income)
+
+
+def savings_rate(savings, income):
+    return _percent_of(savings, _array(income) * 12)
+
+
+# Months of expenses covered; inf when there are savings but no expenses, 0 when neither
+def emergency_fund_months(savings, expenses):
+    savings, expenses = _array(savings), _array(expenses)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        return np.where(expenses > 0, savings / expenses, np.where(savings > 0, np.inf, 0.0))
+
+
+def gross_profit_margin(gross_profit, income):
+    return _percent_of(gross_profit, income)
+
+
+def net_profit_margin(income, expenses, debt):
+    income = _array(income)
+    return _percent_of(income - _array(expenses) - _array(debt), income)
+
+
+# inf passes every ">=" test, so an unlimited emergency fund lands in "good"
+def classify(metric, values):
+    values = _array(values)
+    good, moderate = THRESHOLDS[metric]
+    codes = np.select([good(values), moderate(values)], [0, 1], default=2)
+    return pd.Categorical.from_codes(np.atleast_1d(codes), categories=LEVELS)
+
+
+def level(metric, value):
+    return classify(metric, value)[0]
+
+
+# Every metric and its traffic-light level for any number of businesses at once
+def compute_metrics(income, savings, debt, expenses, gross_profit=0.0):
+    values = {
+        "debt_to_income_ratio": debt_to_income_ratio(debt, income),
+        "savings_rate": savings_rate(savings, income),
+        "emergency_fund_months": emergency_fund_months(savings, expenses),
+        "gross_profit_margin": gross_profit_margin(gross_profit, income),
+        "net_profit_margin": net_profit_margin(income, expenses, debt),
+    }
+    frame = pd.DataFrame({name: np.atleast_1d(value) for name, value in values.items()})
+    for name in values:
+        frame[f"{name}_level"] = classify(name, frame[name])
+    return frame
+
+
+def metrics_frame(df):
+    gross_profit = df["gross_profit"] if "gross_profit" in df else 0.0
+    frame = compute_metrics(df["income"], df["savings"], df["debt"], df["expenses"], gross_profit)
+    frame.index = df.index
+    return frame
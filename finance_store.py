@@ -0,0 +1,184 @@
+import calendar
+import os
+import sys
+import threading
+
+import pandas as pd
+
+import sqlite_store
+
+STORE_FILE = "financial_data.db"
+DEFAULT_TENANT = "default"
+VALUE_COLUMNS = ['Savings ($)', 'Debt ($)', 'Expenses ($)', 'Income ($)']
+CSV_DTYPES = {'Month': 'string', **{name: 'float64' for name in VALUE_COLUMNS}}
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS financial_data (
+    tenant TEXT NOT NULL,
+    year INTEGER NOT NULL,
+    month INTEGER NOT NULL,
+    savings REAL NOT NULL,
+    debt REAL NOT NULL,
+    expenses REAL NOT NULL,
+    income REAL NOT NULL,
+    PRIMARY KEY (tenant, year, month)
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS meta (
+    key TEXT PRIMARY KEY,
+    value TEXT
+);
+"""
+
+_history_cache = {}
+_history_lock = threading.Lock()
+
+
+def connect(path=STORE_FILE):
+    return sqlite_store.connect(path, SCHEMA)
+
+
+def transaction(path=STORE_FILE):
+    return sqlite_store.transaction(path, SCHEMA)
+
+
+def parse_month(label):
+    month_name, year = label.rsplit(" ", 1)
+    return int(year), list(calendar.month_name).index(month_name)
+
+
+def month_label(year, month):
+    return f"{calendar.month_name[month]} {year}"
+
+
+def _row_tuple(tenant, year, month, values):
+    return (tenant, int(year), int(month), *(float(values[name]) for name in VALUE_COLUMNS))
+
+
+# Year/Month_Num are always derived from Month in one parse, so stale copies in old files are ignored
+def read_legacy_csv(csv_path):
+    df = pd.read_csv(csv_path, usecols=list(CSV_DTYPES), dtype=CSV_DTYPES)
+    periods = pd.PeriodIndex(pd.to_datetime(df['Month'], format='%B %Y'), freq='M')
+    df['Year'] = periods.year
+    df['Month_Num'] = periods.month
+    return df
+
+
+def import_rows(conn, tenant, df):
+    conn.executemany(
+        "INSERT OR REPLACE INTO financial_data VALUES (?, ?, ?, ?, ?, ?, ?)",
+        [_row_tuple(tenant, row['Year'], row['Month_Num'], row) for _, row in df.iterrows()],
+    )
+
+
+# One-time setup: import the legacy financial_data.csv if there is one, otherwise seed the
+# sample rows the page used to create. Later calls are a single indexed lookup in meta.
+def _is_initialized(conn):
+    return conn.execute("SELECT 1 FROM meta WHERE key = 'initialized'").fetchone() is not None
+
+
+def init_store(path=STORE_FILE, legacy_csv=None, tenant=DEFAULT_TENANT, sample=None):
+    conn = connect(path)
+    try:
+        if _is_initialized(conn):
+            return
+    finally:
+        conn.close()
+    with transaction(path) as conn:
+        if _is_initialized(conn):
+            return
+        if legacy_csv and os.path.exists(legacy_csv):
+            import_rows(conn, tenant, read_legacy_csv(legacy_csv))
+            source = legacy_csv
+        elif sample is not None:
+            df = pd.DataFrame(sample)
+            df['Year'], df['Month_Num'] = zip(*df['Month'].map(parse_month))
+            import_rows(conn, tenant, df)
+            source = "sample"
+        else:
+            source = "empty"
+        conn.execute("INSERT INTO meta VALUES ('initialized', ?)", (source,))
+
+
+def store_signature(path=STORE_FILE):
+    return sqlite_store.store_signature(path)
+
+
+def _read_history(tenant, path):
+    conn = connect(path)
+    try:
+        rows = conn.execute(
+            "SELECT year, month, savings, debt, expenses, income FROM financial_data "
+            "WHERE tenant = ? ORDER BY year, month",
+            (tenant,),
+        ).fetchall()
+    finally:
+        conn.close()
+    df = pd.DataFrame(rows, columns=['Year', 'Month_Num', *VALUE_COLUMNS])
+    df = df.astype({'Year': 'int64', 'Month_Num': 'int64', **{name: 'float64' for name in VALUE_COLUMNS}})
+    periods = pd.PeriodIndex.from_fields(year=df['Year'], month=df['Month_Num'], freq='M')
+    df['Month'] = periods.strftime('%B %Y')
+    df.index = pd.Index(periods, name='Period')
+    # Same column layout as the legacy CSV
+    return df[['Month', *VALUE_COLUMNS, 'Year', 'Month_Num']]
+
+
+# Process-wide cache of the sorted, typed frame per (store, tenant). Reruns with no new
+# writes only stat the store files; any write changes the signature and forces a re-read.
+# The returned frame is shared between sessions and must be treated as read-only.
+def load_history(tenant=DEFAULT_TENANT, path=STORE_FILE):
+    return load_history_with_signature(tenant, path)[1]
+
+
+# Same frame plus the store signature it was read under, for caches derived from it. The
+# signature is taken before reading, so a write in between only causes an extra re-read.
+def load_history_with_signature(tenant=DEFAULT_TENANT, path=STORE_FILE):
+    signature = store_signature(path)
+    with _history_lock:
+        cached = _history_cache.get((path, tenant))
+    if cached is not None and cached[0] == signature:
+        return cached
+    df = _read_history(tenant, path)
+    with _history_lock:
+        _history_cache[(path, tenant)] = (signature, df)
+    return signature, df
+
+
+def _fetch(conn, tenant, year, month):
+    row = conn.execute(
+        "SELECT savings, debt, expenses, income FROM financial_data WHERE tenant = ? AND year = ? AND month = ?",
+        (tenant, year, month),
+    ).fetchone()
+    return dict(zip(VALUE_COLUMNS, row)) if row else None
+
+
+# Both return the row that was replaced or removed (or None) so callers can keep
+# derived state such as the income model in step without re-reading everything
+def upsert_month(tenant, year, month, values, path=STORE_FILE):
+    with transaction(path) as conn:
+        previous = _fetch(conn, tenant, year, month)
+        conn.execute(
+            "INSERT OR REPLACE INTO financial_data VALUES (?, ?, ?, ?, ?, ?, ?)",
+            _row_tuple(tenant, year, month, values),
+        )
+    return previous
+
+
+def delete_month(tenant, year, month, path=STORE_FILE):
+    with transaction(path) as conn:
+        previous = _fetch(conn, tenant, year, month)
+        conn.execute(
+            "DELETE FROM financial_data WHERE tenant = ? AND year = ? AND month = ?",
+            (tenant, year, month),
+        )
+    return previous
+
+
+if __name__ == "__main__":
+    if len(sys.argv) >= 3 and sys.argv[1] == "migrate":
+        tenant = sys.argv[3] if len(sys.argv) > 3 else DEFAULT_TENANT
+        with transaction(STORE_FILE) as conn:
+            import_rows(conn, tenant, read_legacy_csv(sys.argv[2]))
+            conn.execute("INSERT OR REPLACE INTO meta VALUES ('initialized', ?)", (sys.argv[2],))
+        print(f"Imported {sys.argv[2]} into {STORE_FILE} for tenant '{tenant}'")
+    else:
+        print("usage: python finance_store.py migrate <financial_data.csv> [tenant]")
@@ -0,0 +1,49 @@
+import functools
+import time
+
+import streamlit as st
+from streamlit.runtime.scriptrunner import get_script_run_ctx
+
+import metrics
+
+
+# Fragment and page timings go to the app-wide metrics as the "fragment" series, one per
+# (fragment, scope), so a fragment rerun can be compared with a full page run in
+# metrics.snapshot() or on the Prometheus endpoint (a no-op unless metrics are enabled)
+def _record(name, scope, seconds):
+    metrics.observe("fragment", seconds, fragment=name, scope=scope)
+
+
+# True while Streamlit is rerunning only a fragment rather than the whole script
+def in_fragment_rerun():
+    ctx = get_script_run_ctx()
+    return bool(ctx is not None and getattr(ctx, "fragment_ids_this_run", None))
+
+
+# st.fragment that also times itself. A widget inside the fragment reruns just this function,
+# with the arguments it was last called with from a full run; those arguments are the
+# section's declared inputs, so anything else on the page is left alone. Timings are kept
+# separately for full-page runs and fragment-only reruns.
+def timed_fragment(name):
+    def decorate(func):
+        @functools.wraps(func)
+        def timed(*args, **kwargs):
+            scope = "fragment" if in_fragment_rerun() else "page"
+            started = time.perf_counter()
+            try:
+                return func(*args, **kwargs)
+            finally:
+                _record(name, scope, time.perf_counter() - started)
+        return st.fragment(timed)
+    return decorate
+
+
+# Times a whole script run; call finish() as the page's last statement. Fragment reruns never
+# reach the top level of the script, so they do not count here.
+class PageTimer:
+    def __init__(self, name):
+        self.name = name
+        self.started = time.perf_counter()
+
+    def finish(self):
+        _record(self.name, "page", time.perf_counter() - self.started)
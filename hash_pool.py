@@ -0,0 +1,111 @@
+import os
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeout
+
+import bcrypt
+
+from latency import percentile
+
+# bcrypt releases the GIL while hashing, so a thread pool spreads the work over cores
+# without blocking the Streamlit script threads
+BCRYPT_ROUNDS = int(os.environ.get("BCRYPT_ROUNDS", 12))
+HASH_WORKERS = int(os.environ.get("HASH_WORKERS", min(4, os.cpu_count() or 1)))
+HASH_MAX_PENDING = int(os.environ.get("HASH_MAX_PENDING", 32))
+HASH_TIMEOUT = float(os.environ.get("HASH_TIMEOUT", 10))
+
+
+class PoolBusy(Exception):
+    pass
+
+
+class HashPool:
+    def __init__(self, workers=HASH_WORKERS, max_pending=HASH_MAX_PENDING, rounds=BCRYPT_ROUNDS):
+        self.rounds = rounds
+        self.executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="bcrypt")
+        self.slots = threading.BoundedSemaphore(max_pending)
+        self.lock = threading.Lock()
+        self.timings = {}
+        self.rejected = 0
+
+    def _record(self, op, queued, started):
+        finished = time.perf_counter()
+        with self.lock:
+            samples = self.timings.setdefault(op, {"count": 0, "wait": deque(maxlen=1024), "run": deque(maxlen=1024)})
+            samples["count"] += 1
+            samples["wait"].append(started - queued)
+            samples["run"].append(finished - started)
+
+    def _run(self, op, queued, fn, args):
+        started = time.perf_counter()
+        try:
+            return fn(*args)
+        finally:
+            self._record(op, queued, started)
+
+    # Raises PoolBusy instead of queueing without bound when max_pending jobs are in flight
+    def submit(self, op, fn, *args):
+        if not self.slots.acquire(blocking=False):
+            with self.lock:
+                self.rejected += 1
+            raise PoolBusy(f"{op} queue is full")
+        try:
+            future = self.executor.submit(self._run, op, time.perf_counter(), fn, args)
+        except BaseException:
+            self.slots.release()
+            raise
+        future.add_done_callback(lambda _: self.slots.release())
+        return future
+
+    # A job that is still queued after `timeout` counts as the pool being busy too, so
+    # callers only have PoolBusy to handle
+    def _result(self, op, future, timeout):
+        try:
+            return future.result(timeout=timeout)
+        except FutureTimeout:
+            future.cancel()
+            with self.lock:
+                self.rejected += 1
+            raise PoolBusy(f"{op} timed out after {timeout} s") from None
+
+    def hash_password(self, password, timeout=HASH_TIMEOUT):
+        return self._result("hash", self.submit("hash", _hash, password.encode(), self.rounds), timeout)
+
+    def check_password(self, password, hashed, timeout=HASH_TIMEOUT):
+        return self._result("check", self.submit("check", bcrypt.checkpw, password.encode(), hashed.encode()), timeout)
+
+    def stats(self):
+        with self.lock:
+            report = {"rounds": self.rounds, "rejected": self.rejected}
+            for op, samples in self.timings.items():
+                report[op] = {
+                    "count": samples["count"],
+                    "wait_p50": percentile(samples["wait"], 50),
+                    "run_p50": percentile(samples["run"], 50),
+                    "run_p95": percentile(samples["run"], 95),
+                    "run_max": max(samples["run"], default=0.0),
+                }
+            return report
+
+
+def _hash(password, rounds):
+    return bcrypt.hashpw(password, bcrypt.gensalt(rounds)).decode()
+
+
+hash_pool = HashPool()
+
+
+# streamlit_authenticator verifies logins with Hasher.check_pw on the script thread; pointing
+# it at the pool moves that bcrypt work off it as well. PoolBusy then surfaces from login().
+def route_hasher(hasher):
+    hasher.check_pw = classmethod(lambda cls, password, hashed_password: hash_pool.check_password(password, hashed_password))
+
+
+if __name__ == "__main__":
+    # Time a few hashes at each cost factor to pick BCRYPT_ROUNDS for the latency budget
+    for rounds in range(10, 15):
+        pool = HashPool(rounds=rounds)
+        for _ in range(3):
+            pool.hash_password("benchmark-password", timeout=None)
+        print(f"rounds={rounds}: p50 {pool.stats()['hash']['run_p50'] * 1000:.0f} ms")
@@ -0,0 +1,127 @@
+import threading
+
+import numpy as np
+
+FEATURES = ['Savings ($)', 'Debt ($)', 'Expenses ($)']
+TARGET = 'Income ($)'
+
+
+# Ordinary least squares kept as running sums (n, Σx, Σy, XᵀX, Xᵀy), so adding or
+# removing a row is an O(features²) update. The fit uses the centered normal equations
+# with a pseudo-inverse, which gives the same minimum-norm solution as sklearn's
+# LinearRegression, including when there are fewer rows than features.
+class IncrementalLinearRegression:
+    def __init__(self, n_features=len(FEATURES)):
+        self.n = 0
+        self.sum_x = np.zeros(n_features)
+        self.sum_y = 0.0
+        self.xtx = np.zeros((n_features, n_features))
+        self.xty = np.zeros(n_features)
+        self._fit = None
+
+    @classmethod
+    def from_frame(cls, df):
+        model = cls()
+        X = df[FEATURES].to_numpy(dtype=float)
+        y = df[TARGET].to_numpy(dtype=float)
+        model.n = len(y)
+        model.sum_x = X.sum(axis=0)
+        model.sum_y = float(y.sum())
+        model.xtx = X.T @ X
+        model.xty = X.T @ y
+        return model
+
+    # Models shared between sessions are never changed in place: copy, update, then swap in
+    def copy(self):
+        model = IncrementalLinearRegression(len(self.sum_x))
+        model.n = self.n
+        model.sum_x = self.sum_x.copy()
+        model.sum_y = self.sum_y
+        model.xtx = self.xtx.copy()
+        model.xty = self.xty.copy()
+        return model
+
+    # Cheap check that the running sums describe exactly the rows in df
+    def matches(self, df):
+        X = df[FEATURES].to_numpy(dtype=float)
+        y = df[TARGET].to_numpy(dtype=float)
+        return (
+            self.n == len(y)
+            and np.isclose(self.sum_y, y.sum())
+            and np.allclose(self.sum_x, X.sum(axis=0))
+            and np.allclose(self.xty, X.T @ y)
+        )
+
+    def add(self, x, y, sign=1.0):
+        x = np.asarray(x, dtype=float)
+        self.n += int(sign)
+        self.sum_x += sign * x
+        self.sum_y += sign * float(y)
+        self.xtx += sign * np.outer(x, x)
+        self.xty += sign * x * float(y)
+        self._fit = None
+
+    def remove(self, x, y):
+        self.add(x, y, sign=-1.0)
+
+    def _solve(self):
+        if self.n == 0:
+            raise ValueError("No data to fit the income model")
+        mean_x = self.sum_x / self.n
+        mean_y = self.sum_y / self.n
+        sxx = self.xtx - self.n * np.outer(mean_x, mean_x)
+        sxy = self.xty - self.n * mean_x * mean_y
+        # Subtracting the means cancels most of XᵀX, so judge singular values against the
+        # uncentered scale; otherwise round-off from add/remove looks like real variance
+        eigvals, eigvecs = np.linalg.eigh(sxx)
+        cutoff = 1e-9 * max(np.abs(self.xtx).max(), np.finfo(float).tiny)
+        keep = eigvals > cutoff
+        inverse = (eigvecs[:, keep] / eigvals[keep]) @ eigvecs[:, keep].T
+        coef = inverse @ sxy
+        # One assignment, so a concurrent reader sees either no fit or a complete one
+        self._fit = (coef, mean_y - mean_x @ coef)
+        return self._fit
+
+    @property
+    def coef_(self):
+        return (self._fit or self._solve())[0]
+
+    @property
+    def intercept_(self):
+        return (self._fit or self._solve())[1]
+
+    def predict(self, X):
+        coef, intercept = self._fit or self._solve()
+        return np.asarray(X, dtype=float) @ coef + intercept
+
+
+def row_values(row):
+    return [row[name] for name in FEATURES], row[TARGET]
+
+
+# One model per data file for the whole process, keyed by the store signature the rows were
+# read under (see finance_store.load_history_with_signature). Edits update a copy of the
+# model and register it; sessions still predicting with the old one are unaffected.
+_models = {}
+_lock = threading.Lock()
+
+
+def get_income_model(path, df, signature):
+    with _lock:
+        cached = _models.get(path)
+        if cached is not None and cached[0] == signature:
+            return cached[1]
+    model = IncrementalLinearRegression.from_frame(df)
+    with _lock:
+        _models[path] = (signature, model)
+    return model
+
+
+# Registers an incrementally updated model for the rows just re-read after a write. If another
+# session wrote in between, the sums no longer match those rows and the model is rebuilt.
+def remember_income_model(path, model, df, signature):
+    if not model.matches(df):
+        model = IncrementalLinearRegression.from_frame(df)
+    with _lock:
+        _models[path] = (signature, model)
+    return model
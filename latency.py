@@ -0,0 +1,48 @@
+import bisect
+import threading
+
+# Upper bounds in seconds, roughly 1.5x apart from 25 ms to about 2 minutes
+LATENCY_BUCKETS = [0.025 * 1.5 ** i for i in range(22)]
+
+
+# Fixed-bucket latency histogram, shared by the LLM router's hedge delays and the app-wide
+# metrics; observing is one bisect under a lock, so it is cheap enough for every request
+class LatencyHistogram:
+    def __init__(self, buckets=LATENCY_BUCKETS):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.count = 0
+        self.total = 0.0
+        self.lock = threading.Lock()
+
+    def observe(self, seconds):
+        with self.lock:
+            self.counts[bisect.bisect_left(self.buckets, seconds)] += 1
+            self.count += 1
+            self.total += seconds
+
+    # Upper bound of the bucket holding the q-th percentile, the usual histogram estimate
+    def percentile(self, q):
+        with self.lock:
+            if not self.count:
+                return None
+            target = self.count * q / 100
+            running = 0
+            for index, count in enumerate(self.counts):
+                running += count
+                if running >= target:
+                    return self.buckets[index] if index < len(self.buckets) else float("inf")
+        return float("inf")
+
+    def snapshot(self):
+        with self.lock:
+            return {"count": self.count, "mean": self.total / self.count if self.count else None}
+
+
+# Nearest-rank percentile of raw samples, for the pools and streams that keep a window of
+# recent timings rather than a histogram. None values are skipped; None when there are none.
+def percentile(values, q):
+    values = sorted(value for value in values if value is not None)
+    if not values:
+        return None
+    return values[min(len(values) - 1, int(len(values) * q / 100))]
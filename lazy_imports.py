@@ -0,0 +1,53 @@
+import importlib
+import sys
+import threading
+import time
+import types
+
+_load_times = {}
+_lock = threading.Lock()
+
+
+# Stand-in module that imports the real one on first attribute access. Pages bind heavy
+# dependencies through this so a cold start only pays for what the page actually touches.
+class LazyModule(types.ModuleType):
+    def __init__(self, name):
+        super().__init__(name)
+        self.__dict__["_lazy_target"] = name
+        self.__dict__["_lazy_module"] = None
+
+    def _load(self):
+        module = self.__dict__["_lazy_module"]
+        if module is None:
+            name = self.__dict__["_lazy_target"]
+            with _lock:
+                module = self.__dict__["_lazy_module"]
+                if module is None:
+                    already_loaded = name in sys.modules
+                    started = time.perf_counter()
+                    module = importlib.import_module(name)
+                    if not already_loaded:
+                        _load_times[name] = time.perf_counter() - started
+                    self.__dict__["_lazy_module"] = module
+        return module
+
+    def __getattr__(self, attr):
+        return getattr(self._load(), attr)
+
+    def __dir__(self):
+        return dir(self._load())
+
+    def __repr__(self):
+        state = "loaded" if self.__dict__["_lazy_module"] is not None else "not loaded"
+        return f"<lazy module '{self.__dict__['_lazy_target']}' ({state})>"
+
+
+def lazy_import(name):
+    module = sys.modules.get(name)
+    return module if module is not None else LazyModule(name)
+
+
+# Seconds spent importing each module on first use in this process
+def lazy_load_times():
+    with _lock:
+        return dict(_load_times)
@@ -0,0 +1,256 @@
+import queue
+import random
+import threading
+import time
+
+from latency import LatencyHistogram
+
+# A backend turns a message list into a stream of text chunks. stream() must be a generator,
+# so closing it releases whatever the backend holds (sockets, remote predictions). timeout,
+# when given, is the seconds the whole request may take; blocking waits give up once it has
+# passed instead of holding the caller until a chunk arrives.
+class Backend:
+    name = "backend"
+
+    def stream(self, messages, params=None, timeout=None):
+        raise NotImplementedError
+
+
+class CerebrasBackend(Backend):
+    def __init__(self, client, model="llama3.1-8b"):
+        self.client = client
+        self.model = model
+        self.name = f"cerebras:{model}"
+
+    # The SDK applies a per-request timeout to the connect and to every read of the stream
+    def stream(self, messages, params=None, timeout=None):
+        options = {"timeout": timeout} if timeout is not None else {}
+        response = self.client.chat.completions.create(messages=messages, model=self.model, stream=True, **(params or {}), **options)
+        try:
+            for i in response:
+                yield i.choices[0].delta.content or ""
+        finally:
+            response.close()
+
+
+class ReplicateBackend(Backend):
+    def __init__(self, model="meta/meta-llama-3-8b-instruct", params=None):
+        self.model = model
+        self.params = params or {}
+        self.name = f"replicate:{model}"
+
+    # replicate.run has no per-request timeout; the deadline is checked as outputs arrive
+    def stream(self, messages, params=None, timeout=None):
+        import replicate
+        system = "\n".join(m["content"] for m in messages if m["role"] == "system")
+        turns = [m for m in messages if m["role"] != "system"]
+        if len(turns) == 1:
+            prompt = turns[0]["content"]
+        else:
+            prompt = "\n".join(f"{m['role']}: {m['content']}" for m in turns)
+        inputs = {**self.params, **(params or {}), "prompt": prompt}
+        if system:
+            inputs["system_prompt"] = system
+        deadline = None if timeout is None else time.perf_counter() + timeout
+        for i in replicate.run(self.model, input=inputs):
+            if deadline is not None and time.perf_counter() > deadline:
+                raise TimeoutError(f"{self.name} timed out after {timeout} s")
+            yield str(i)
+
+
+# In-process stand-in for offline tail-latency tests. ttft may be a number or a callable
+# returning one, so a test can draw from a heavy-tailed distribution.
+class FakeBackend(Backend):
+    def __init__(self, name="fake", chunks=("Hello", " from", " fake"), ttft=0.05, chunk_delay=0.0, failure_rate=0.0, seed=None):
+        self.name = name
+        self.chunks = list(chunks)
+        self.ttft = ttft
+        self.chunk_delay = chunk_delay
+        self.failure_rate = failure_rate
+        self.random = random.Random(seed)
+        self.calls = 0
+
+    # Like a client timeout, a first token later than `timeout` raises TimeoutError at the deadline
+    def stream(self, messages, params=None, timeout=None):
+        self.calls += 1
+        ttft = self.ttft() if callable(self.ttft) else self.ttft
+        if timeout is not None and ttft > timeout:
+            time.sleep(timeout)
+            raise TimeoutError(f"{self.name} timed out after {timeout} s")
+        time.sleep(ttft)
+        if self.random.random() < self.failure_rate:
+            raise ConnectionError(f"{self.name} failed")
+        for index, chunk in enumerate(self.chunks):
+            if index and self.chunk_delay:
+                time.sleep(self.chunk_delay)
+            yield chunk
+
+
+# on_first_token is called from the attempt's thread when its first chunk arrives, whether
+# or not the attempt has been cancelled by then, so the losers of a hedge are timed too
+class _Attempt:
+    def __init__(self, index, backend, messages, params, events, timeout=None, on_first_token=None):
+        self.index = index
+        self.backend = backend
+        self.cancelled = threading.Event()
+        self.started = time.perf_counter()
+        self.first_token = None
+        self.on_first_token = on_first_token
+        self.thread = threading.Thread(target=self._run, args=(messages, params, events, timeout), daemon=True)
+        self.thread.start()
+
+    def _run(self, messages, params, events, timeout):
+        stream = self.backend.stream(messages, params, timeout)
+        try:
+            for chunk in stream:
+                # Empty chunks (e.g. Cerebras' role-only first delta) carry no tokens; passing
+                # them on would let a backend that has not answered yet win the hedge
+                if not chunk:
+                    if self.cancelled.is_set():
+                        return
+                    continue
+                if self.first_token is None:
+                    self.first_token = time.perf_counter()
+                    if self.on_first_token is not None:
+                        self.on_first_token(self)
+                if self.cancelled.is_set():
+                    return
+                events.put((self.index, "chunk", chunk))
+            events.put((self.index, "done", None))
+        except Exception as e:
+            events.put((self.index, "error", e))
+        finally:
+            stream.close()
+
+
+# Sends each request to the first backend and, if it has not produced a token by its own
+# p95 time-to-first-token, hedges the same request to the next backend; whichever answers
+# first wins and the other is cancelled. Errors before the first token fail over to the
+# next backend. Once a backend has started answering, the router stays with it. Every
+# attempt that produces a token feeds its backend's time-to-first-token, cancelled ones
+# included; counting only winners would leave out exactly the slow responses the hedge
+# delay is meant to catch. With a timeout, every wait on the attempts is bounded by what is
+# left of it and the router raises TimeoutError when it runs out; each attempt gets the same
+# remaining time for its own request.
+class Router(Backend):
+    def __init__(self, backends, hedge_percentile=95, default_hedge_delay=1.0, min_hedge_delay=0.1, min_samples=20):
+        self.backends = list(backends)
+        self.name = "router(" + ",".join(backend.name for backend in self.backends) + ")"
+        self.hedge_percentile = hedge_percentile
+        self.default_hedge_delay = default_hedge_delay
+        self.min_hedge_delay = min_hedge_delay
+        self.min_samples = min_samples
+        self.ttft = {backend.name: LatencyHistogram() for backend in self.backends}
+        self.latency = {backend.name: LatencyHistogram() for backend in self.backends}
+        self.counters = {backend.name: {"requests": 0, "wins": 0, "errors": 0, "hedged": 0} for backend in self.backends}
+        self.lock = threading.Lock()
+
+    def hedge_delay(self, backend):
+        histogram = self.ttft[backend.name]
+        if histogram.count < self.min_samples:
+            return self.default_hedge_delay
+        return max(self.min_hedge_delay, histogram.percentile(self.hedge_percentile))
+
+    def _count(self, backend, key):
+        with self.lock:
+            self.counters[backend.name][key] += 1
+
+    def _launch(self, attempts, index, messages, params, events, deadline):
+        backend = self.backends[index]
+        self._count(backend, "requests")
+        timeout = None if deadline is None else max(0.0, deadline - time.perf_counter())
+        attempts[index] = _Attempt(index, backend, messages, params, events, timeout, self._observe_ttft)
+
+    def _observe_ttft(self, attempt):
+        self.ttft[attempt.backend.name].observe(attempt.first_token - attempt.started)
+
+    def stream(self, messages, params=None, timeout=None):
+        events = queue.Queue()
+        attempts = {}
+        next_index = 0
+        winner = None
+        last_error = None
+        deadline = None if timeout is None else time.perf_counter() + timeout
+
+        def remaining():
+            return None if deadline is None else max(0.0, deadline - time.perf_counter())
+
+        def expired():
+            return TimeoutError(f"{self.name} timed out after {timeout} s")
+
+        self._launch(attempts, next_index, messages, params, events, deadline)
+        next_index += 1
+        try:
+            # Phase 1: wait for the first token, hedging or failing over as needed
+            while winner is None:
+                live = [attempt for attempt in attempts.values() if not attempt.cancelled.is_set()]
+                if not live:
+                    if next_index >= len(self.backends):
+                        raise last_error or RuntimeError("No backend produced a response")
+                    self._launch(attempts, next_index, messages, params, events, deadline)
+                    next_index += 1
+                    continue
+                newest = max(live, key=lambda attempt: attempt.started)
+                wait = remaining()
+                if next_index < len(self.backends):
+                    hedge = max(0.0, newest.started + self.hedge_delay(newest.backend) - time.perf_counter())
+                    wait = hedge if wait is None else min(wait, hedge)
+                try:
+                    index, kind, payload = events.get(timeout=wait)
+                except queue.Empty:
+                    if deadline is not None and time.perf_counter() >= deadline:
+                        raise expired()
+                    self._count(newest.backend, "hedged")
+                    self._launch(attempts, next_index, messages, params, events, deadline)
+                    next_index += 1
+                    continue
+                attempt = attempts[index]
+                if attempt.cancelled.is_set():
+                    continue
+                if kind == "error":
+                    last_error = payload
+                    attempt.cancelled.set()
+                    self._count(attempt.backend, "errors")
+                    continue
+                winner = attempt
+                self._count(attempt.backend, "wins")
+                for other in attempts.values():
+                    if other is not attempt:
+                        other.cancelled.set()
+                if kind == "done":
+                    self.latency[attempt.backend.name].observe(time.perf_counter() - attempt.started)
+                    return
+                yield payload
+            # Phase 2: relay the winner's remaining chunks
+            while True:
+                try:
+                    index, kind, payload = events.get(timeout=remaining())
+                except queue.Empty:
+                    raise expired()
+                if index != winner.index:
+                    continue
+                if kind == "chunk":
+                    yield payload
+                elif kind == "done":
+                    self.latency[winner.backend.name].observe(time.perf_counter() - winner.started)
+                    return
+                else:
+                    self._count(winner.backend, "errors")
+                    raise payload
+        finally:
+            for attempt in attempts.values():
+                attempt.cancelled.set()
+
+    def stats(self):
+        report = {}
+        for backend in self.backends:
+            with self.lock:
+                counters = dict(self.counters[backend.name])
+            report[backend.name] = {
+                **counters,
+                "ttft_p50": self.ttft[backend.name].percentile(50),
+                "ttft_p95": self.ttft[backend.name].percentile(95),
+                "latency_p95": self.latency[backend.name].percentile(95),
+                "hedge_delay": self.hedge_delay(backend),
+            }
+        return report
@@ -0,0 +1,222 @@
+import functools
+import json
+import logging
+import logging.handlers
+import os
+import threading
+import time
+from contextlib import nullcontext
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import streamlit as st
+from streamlit.runtime.scriptrunner import get_script_run_ctx
+
+from latency import LatencyHistogram
+
+# Off unless METRICS_ENABLED=1; while off every call below returns before touching any state
+ENABLED = os.environ.get("METRICS_ENABLED", "0") == "1"
+PREFIX = "app_"
+
+# Upper bounds in seconds, 1.5x apart from half a millisecond to about 8 minutes, so cache
+# hits and full OCR passes both land in useful buckets
+METRIC_BUCKETS = [0.0005 * 1.5 ** i for i in range(35)]
+
+_histograms = {}
+_counters = {}
+_lock = threading.Lock()
+_null_timer = nullcontext()
+_log = None
+_server = None
+
+
+def enable(log_path=None):
+    global ENABLED
+    ENABLED = True
+    if log_path:
+        _open_log(log_path)
+
+
+def disable():
+    global ENABLED
+    ENABLED = False
+
+
+# Pages name themselves once per run; the label sticks to the session so fragment reruns and
+# helper modules are tagged with the page that triggered them
+def set_page(name):
+    if ENABLED and get_script_run_ctx() is not None:
+        st.session_state["_metrics_page"] = name
+
+
+def _context():
+    ctx = get_script_run_ctx()
+    if ctx is None:
+        return "-", "-"
+    return st.session_state.get("_metrics_page", "-"), ctx.session_id
+
+
+# Prometheus series are per page (sessions would make unbounded label sets); the JSON log
+# keeps the session id on every event
+def _series(name, labels):
+    return name, tuple(sorted(labels.items()))
+
+
+def _emit(kind, name, value, page, session, labels):
+    if _log is not None:
+        _log.info(json.dumps({"ts": time.time(), "kind": kind, "metric": name, "value": value, "page": page, "session": session, **labels}))
+
+
+def observe(name, seconds, **labels):
+    if not ENABLED or seconds is None:
+        return
+    page, session = _context()
+    key = _series(name, {"page": page, **labels})
+    histogram = _histograms.get(key)
+    if histogram is None:
+        with _lock:
+            histogram = _histograms.setdefault(key, LatencyHistogram(METRIC_BUCKETS))
+    histogram.observe(seconds)
+    _emit("timer", name, seconds, page, session, labels)
+
+
+def count(name, value=1, **labels):
+    if not ENABLED:
+        return
+    page, session = _context()
+    key = _series(name, {"page": page, **labels})
+    with _lock:
+        _counters[key] = _counters.get(key, 0) + value
+    _emit("counter", name, value, page, session, labels)
+
+
+class _Timer:
+    def __init__(self, name, labels):
+        self.name = name
+        self.labels = labels
+
+    def __enter__(self):
+        self.started = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        labels = self.labels if exc_type is None else {**self.labels, "error": exc_type.__name__}
+        observe(self.name, time.perf_counter() - self.started, **labels)
+
+
+def timer(name, **labels):
+    return _Timer(name, labels) if ENABLED else _null_timer
+
+
+def timed(name, **labels):
+    def decorate(func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            if not ENABLED:
+                return func(*args, **kwargs)
+            with _Timer(name, labels):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorate
+
+
+# p50/p99 per series, read from the histogram buckets
+def snapshot():
+    with _lock:
+        histograms = dict(_histograms)
+        counters = dict(_counters)
+    report = {}
+    for (name, labels), histogram in sorted(histograms.items()):
+        report[name + _format_labels(labels)] = {
+            **histogram.snapshot(),
+            "p50": histogram.percentile(50),
+            "p99": histogram.percentile(99),
+        }
+    for (name, labels), value in sorted(counters.items()):
+        report[name + _format_labels(labels)] = {"count": value}
+    return report
+
+
+def _format_labels(labels, extra=()):
+    pairs = [*labels, *extra]
+    if not pairs:
+        return ""
+    escaped = (str(value).replace("\\", "\\\\").replace('"', '\\"') for _, value in pairs)
+    return "{" + ",".join(f'{key}="{value}"' for (key, _), value in zip(pairs, escaped)) + "}"
+
+
+def render_prometheus():
+    with _lock:
+        histograms = dict(_histograms)
+        counters = dict(_counters)
+    lines = []
+    for name in sorted({name for name, _ in histograms}):
+        metric = f"{PREFIX}{name}_seconds"
+        lines.append(f"# TYPE {metric} histogram")
+        for (series_name, labels), histogram in sorted(histograms.items()):
+            if series_name != name:
+                continue
+            with histogram.lock:
+                counts, total, observed = list(histogram.counts), histogram.total, histogram.count
+            running = 0
+            for bound, bucket_count in zip(histogram.buckets, counts):
+                running += bucket_count
+                lines.append(f"{metric}_bucket{_format_labels(labels, [('le', f'{bound:.6g}')])} {running}")
+            lines.append(f"{metric}_bucket{_format_labels(labels, [('le', '+Inf')])} {observed}")
+            lines.append(f"{metric}_sum{_format_labels(labels)} {total}")
+            lines.append(f"{metric}_count{_format_labels(labels)} {observed}")
+    for name in sorted({name for name, _ in counters}):
+        metric = f"{PREFIX}{name}_total"
+        lines.append(f"# TYPE {metric} counter")
+        for (series_name, labels), value in sorted(counters.items()):
+            if series_name == name:
+                lines.append(f"{metric}{_format_labels(labels)} {value}")
+    return "\n".join(lines) + "\n"
+
+
+class _MetricsHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        if self.path.split("?")[0] != "/metrics":
+            self.send_error(404)
+            return
+        body = render_prometheus().encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+# Serves /metrics from a daemon thread; one server per process, later calls are no-ops
+def start_http_server(port, host="0.0.0.0"):
+    global _server
+    with _lock:
+        if _server is None:
+            _server = ThreadingHTTPServer((host, port), _MetricsHandler)
+            threading.Thread(target=_server.serve_forever, name="metrics-http", daemon=True).start()
+    return _server
+
+
+# One JSON object per line, rotated by size
+def _open_log(path, max_bytes=10 * 1024 * 1024, backups=5):
+    global _log
+    logger = logging.getLogger("app.metrics")
+    if not logger.handlers:
+        handler = logging.handlers.RotatingFileHandler(path, maxBytes=max_bytes, backupCount=backups)
+        handler.setFormatter(logging.Formatter("%(message)s"))
+        logger.addHandler(handler)
+        logger.setLevel(logging.INFO)
+        logger.propagate = False
+    _log = logger
+
+
+if ENABLED:
+    if os.environ.get("METRICS_LOG"):
+        _open_log(os.environ["METRICS_LOG"], int(os.environ.get("METRICS_LOG_BYTES", 10 * 1024 * 1024)))
+    if os.environ.get("METRICS_PORT"):
+        try:
+            start_http_server(int(os.environ["METRICS_PORT"]))
+        except OSError as e:
+            logging.getLogger(__name__).warning("metrics endpoint not started: %s", e)
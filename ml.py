@@ -1,12 +1,14 @@
 import streamlit as st
 import numpy as np
 import pandas as pd
-import matplotlib.pyplot as plt
-from sklearn.linear_model import LinearRegression
-import os
+import altair as alt
+from income_model import get_income_model, remember_income_model, row_values
+from finance_store import STORE_FILE, DEFAULT_TENANT, init_store, load_history_with_signature, upsert_month, delete_month
+import metrics
 
 st.set_page_config(page_title="Small Business Financial Wellness App", layout="centered")
 st.title("📈 Predictive Models on Financial Plans")
+metrics.set_page("ml")
 st.markdown(
     """
     **Monitor and improve your company’s financial health**  
@@ -14,21 +16,17 @@ st.markdown(
     """
 )
 DATA_FILE = "financial_data.csv"
-if os.path.exists(DATA_FILE):
-    df = pd.read_csv(DATA_FILE)
-else:
-    data = {
-        'Month': ['January 2024', 'February 2024', 'March 2024', 'April 2024'],
-        'Savings ($)': [1000, 5000, 10000, 20000],
-        'Debt ($)': [500, 1500, 1000, 2500],
-        'Expenses ($)': [1000, 2000, 1500, 3000],
-        'Income ($)': [5000, 15000, 20000, 25000]
-    }
-    df = pd.DataFrame(data)
-    df.to_csv(DATA_FILE, index=False)
-df['Year'] = pd.to_datetime(df['Month'], format='%B %Y').dt.year
-df['Month_Num'] = pd.to_datetime(df['Month'], format='%B %Y').dt.month
-df = df.sort_values(by=['Year', 'Month_Num'], ascending=[True, True])
+# All sessions share one book today, exactly as they shared the CSV
+TENANT = DEFAULT_TENANT
+sample_data = {
+    'Month': ['January 2024', 'February 2024', 'March 2024', 'April 2024'],
+    'Savings ($)': [1000, 5000, 10000, 20000],
+    'Debt ($)': [500, 1500, 1000, 2500],
+    'Expenses ($)': [1000, 2000, 1500, 3000],
+    'Income ($)': [5000, 15000, 20000, 25000]
+}
+init_store(STORE_FILE, legacy_csv=DATA_FILE, tenant=TENANT, sample=sample_data)
+history_signature, df = load_history_with_signature(TENANT)
 
 st.header("Enter Financial Information")
 
@@ -44,14 +42,15 @@ with col2:
 
 st.header("Income Prediction")
 
-def predict_income(savings, debt, expenses, df):
-    X = df[['Savings ($)', 'Debt ($)', 'Expenses ($)']]
-    y = df['Income ($)']
-    model = LinearRegression()
-    model.fit(X, y)
+# The model is fitted once per data file and updated row by row when data is added or removed
+with metrics.timer("income_model_load"):
+    income_model = get_income_model(STORE_FILE, df, history_signature)
+
+@metrics.timed("predict_income")
+def predict_income(savings, debt, expenses, model):
     prediction = model.predict(np.array([[savings, debt, expenses]]))
     return prediction[0]
-predicted_income = predict_income(savings, debt, expenses, df)
+predicted_income = predict_income(savings, debt, expenses, income_model)
 st.write(f"**Predicted Monthly Income: ${predicted_income:,.2f}**")
 
 if predicted_income < 5000:
@@ -76,20 +75,21 @@ new_expenses = st.number_input("Expenses ($)", min_value=0.0, format="%.2f")
 
 if st.button("Add Data"):
     if month and year and new_savings and new_debt and new_expenses:
-        new_data = pd.DataFrame({
-            'Month': [f"{month} {year}"],
-            'Savings ($)': [new_savings],
-            'Debt ($)': [new_debt],
-            'Expenses ($)': [new_expenses],
-            'Income ($)': [predict_income(new_savings, new_debt, new_expenses, df)], 
-        })
-        df = pd.concat([df, new_data], ignore_index=True)
-        df['Year'] = pd.to_datetime(df['Month'], format='%B %Y').dt.year
-        df['Month_Num'] = pd.to_datetime(df['Month'], format='%B %Y').dt.month
-        df = df.sort_values(by=['Year', 'Month_Num'], ascending=[True, True])
-        df.to_csv(DATA_FILE, index=False)
+        new_values = {
+            'Savings ($)': new_savings,
+            'Debt ($)': new_debt,
+            'Expenses ($)': new_expenses,
+            'Income ($)': predict_income(new_savings, new_debt, new_expenses, income_model),
+        }
+        previous = upsert_month(TENANT, year, months.index(month) + 1, new_values)
+        updated_model = income_model.copy()
+        if previous:
+            updated_model.remove(*row_values(previous))
+        updated_model.add(*row_values(new_values))
+        history_signature, df = load_history_with_signature(TENANT)
+        income_model = remember_income_model(STORE_FILE, updated_model, df, history_signature)
         st.dataframe(df)
-        predicted_income = predict_income(new_savings, new_debt, new_expenses, df)
+        predicted_income = predict_income(new_savings, new_debt, new_expenses, income_model)
         st.write(f"**Updated Predicted Monthly Income: ${predicted_income:,.2f}**")
         
         st.success(f"Data for {month} {year} added successfully!")
@@ -102,22 +102,30 @@ remove_year = st.selectbox("Select Year to Remove", years)
 if st.button("Remove Data"):
     if remove_month and remove_year:
         month_year_str = f"{remove_month} {remove_year}"
-        df = df[df['Month'] != month_year_str]
-        df.to_csv(DATA_FILE, index=False)
+        removed = delete_month(TENANT, remove_year, months.index(remove_month) + 1)
+        history_signature, df = load_history_with_signature(TENANT)
+        if removed:
+            updated_model = income_model.copy()
+            updated_model.remove(*row_values(removed))
+            income_model = remember_income_model(STORE_FILE, updated_model, df, history_signature)
         st.dataframe(df)
         
         st.success(f"Data for {month_year_str} removed successfully!")
     else:
         st.error("Please select both a month and year to remove data.")
 st.header("Financial Data Visualization")
-fig, ax = plt.subplots(figsize=(10, 6))
-ax.plot(df['Month'], df['Savings ($)'], marker='o', label="Savings")
-ax.plot(df['Month'], df['Income ($)'], marker='o', label="Income")
-ax.set_xlabel("Month")
-ax.set_ylabel("Amount ($)")
-ax.set_title("Business Financial Health Over Time")
-ax.legend()
-st.pyplot(fig)
+# Rendered by the browser through Vega-Lite, so reruns only resend the data points
+history = pd.DataFrame({
+    'Month': df.index.to_timestamp(),
+    'Savings': df['Savings ($)'].to_numpy(),
+    'Income': df['Income ($)'].to_numpy(),
+}).melt('Month', var_name='Series', value_name='Amount ($)')
+history_chart = alt.Chart(history, title="Business Financial Health Over Time").mark_line(point=True).encode(
+    x=alt.X('Month:T', title="Month"),
+    y=alt.Y('Amount ($):Q'),
+    color=alt.Color('Series:N', title=None),
+)
+st.altair_chart(history_chart, use_container_width=True)
 st.header("Set Financial Goals")
 
 goal_savings = st.number_input("Set Savings Goal ($)", min_value=0.0, format="%.2f")
@@ -1,53 +1,124 @@
-import replicate
 import os
-from cerebras.cloud.sdk import Cerebras
+import threading
+from context_window import ContextWindow, llm_summarizer
+from response_cache import response_cache
+from streaming import ManagedStream
+from llm_backends import CerebrasBackend, ReplicateBackend, Router
+from lazy_imports import lazy_import
+
+# The SDK and its HTTP stack load when the first client is built, not when the page imports
+httpx = lazy_import("httpx")
+cerebras_sdk = lazy_import("cerebras.cloud.sdk")
+
+_client = None
+_client_lock = threading.Lock()
+
+# One client for the whole process, shared by every session. Its httpx pool keeps
+# connections to the API alive, so each turn skips the TCP and TLS handshakes.
+def get_cerebras_client():
+    global _client
+    if _client is None:
+        with _client_lock:
+            if _client is None:
+                _client = cerebras_sdk.Cerebras(
+                    api_key=os.environ.get("CEREBRAS_API_KEY"),
+                    http_client=httpx.Client(
+                        limits=httpx.Limits(max_connections=32, max_keepalive_connections=16, keepalive_expiry=120),
+                        timeout=httpx.Timeout(60.0, connect=5.0),
+                    ),
+                )
+    return _client
+
+_backend = None
+
+# Cerebras answers chat turns; when Replicate is configured it becomes the hedge and
+# failover target for slow or failing Cerebras requests
+def get_chat_backend():
+    global _backend
+    if _backend is None:
+        with _client_lock:
+            if _backend is None:
+                backends = [CerebrasBackend(get_cerebras_client())]
+                if os.environ.get("REPLICATE_API_TOKEN"):
+                    backends.append(ReplicateBackend())
+                _backend = Router(backends) if len(backends) > 1 else backends[0]
+    return _backend
 
 class Chatbot:
     def __init__(self,model="meta/meta-llama-3-8b-instruct"):
         self.model = model
-    
-    def prompt(self, prompt):
-        for i in replicate.run(
-            f"{self.model}",
-            input={
-                "top_k": 50,
-                "top_p": 1,
-                "prompt": f"{prompt}",
-                "decoding": "top_p",
-                "max_length": 50,
-                "temperature": 0.75,
-                "repetition_penalty": 1.2
-            }
-        ):
-            yield i
+        self.params = {
+            "top_k": 50,
+            "top_p": 1,
+            "decoding": "top_p",
+            "max_length": 50,
+            "temperature": 0.75,
+            "repetition_penalty": 1.2
+        }
+        self.backend = ReplicateBackend(model, self.params)
+        self.active = None
+
+    #each prompt stands alone here, so every answer can be served from the response cache
+    def prompt(self, prompt, deadline=None):
+        key = response_cache.key(prompt, self.model, self.params)
+        yield from response_cache.stream(key, lambda: self._generate(prompt, deadline))
+
+    def cancel(self):
+        if self.active is not None:
+            self.active.cancel()
+
+    def _generate(self, prompt, deadline=None):
+        messages = [{"role": "user", "content": f"{prompt}"}]
+        self.active = ManagedStream(lambda timeout: self.backend.stream(messages, timeout=timeout), name=self.backend.name, deadline=deadline)
+        return self.active
 
 #upgraded chatbot with message memory
+#messages is the conversation store; pass the session's list so the history survives reruns
+#context trims what is sent to the model; keep it next to messages so its summary survives too
+#backend is any llm_backends.Backend, e.g. the shared Router from get_chat_backend()
 class CerebrasChatbot:
-    def __init__(self):
-        self.client = Cerebras(
-            # This is the default and can be omitted
-            api_key = os.environ.get("CEREBRAS_API_KEY"),
-            # api_key="csk-xd8t5rj64mmk6j969t2hn26henttx5xc3jhh3jt9m9px8rkm",
-        )
-        self.messages = []
+    def __init__(self, messages=None, client=None, context=None, model="llama3.1-8b", backend=None):
+        self.client = client or get_cerebras_client()
+        self.model = model
+        self.backend = backend or CerebrasBackend(self.client, model)
+        self.messages = messages if messages is not None else []
+        self.context = context or ContextWindow(llm_summarizer(self.client, model))
+        self.active = None
     
-    def prompt(self,prompt):
+    def prompt(self, prompt, deadline=None):
+        #only an opening question is answered independently of earlier turns, so only it is cached
+        cacheable = not self.messages
         self.messages.append({
                     "role": "user",
                     "content": f"{prompt}",
                 })
-        stream = self.client.chat.completions.create(
-            messages=self.messages,
-            model="llama3.1-8b",
-            stream = True,
-        )
-        st = ""
-        
-        for i in stream:
-            st+=f"{i.choices[0].delta.content} "
-            yield i.choices[0].delta.content or ""
-            
-        self.messages.append({
-                    "role": "assistant",
-                    "content": f"{st}",
-                })
+        if cacheable:
+            chunks = response_cache.stream(response_cache.key(prompt, self.backend.name), lambda: self._generate(deadline))
+        else:
+            response_cache.bypass()
+            chunks = self._generate(deadline)
+        parts = []
+
+        try:
+            for content in chunks:
+                parts.append(content)
+                yield content
+        finally:
+            #keep whatever was answered, even if the stream was cut short; drop unanswered questions
+            if parts:
+                self.messages.append({
+                            "role": "assistant",
+                            "content": "".join(parts),
+                        })
+                self.context.after_turn(self.messages)
+            else:
+                self.messages.pop()
+
+    def cancel(self):
+        if self.active is not None:
+            self.active.cancel()
+
+    def _generate(self, deadline=None):
+        messages = self.context.build(self.messages)
+        self.active = ManagedStream(lambda timeout: self.backend.stream(messages, timeout=timeout), name=self.backend.name, deadline=deadline)
+        return self.active
@@ -0,0 +1,145 @@
+import importlib.util
+import os
+import shlex
+import threading
+import time
+from collections import deque
+
+from latency import percentile
+from lazy_imports import lazy_import
+
+# Several engines run side by side; letting each one start its own OpenMP team only
+# oversubscribes the cores. Must be set before libtesseract loads.
+os.environ.setdefault("OMP_THREAD_LIMIT", "1")
+
+pytesseract = lazy_import("pytesseract")
+tesserocr = lazy_import("tesserocr")
+
+# tesserocr (optional, needs libtesseract to build; see requirements-ocr.txt) keeps engines
+# in-process with their language models loaded; without it every call falls back to a
+# pytesseract subprocess
+HAVE_TESSEROCR = importlib.util.find_spec("tesserocr") is not None
+OCR_BACKEND = os.environ.get("OCR_BACKEND", "tesserocr" if HAVE_TESSEROCR else "pytesseract")
+OCR_WORKERS = int(os.environ.get("OCR_WORKERS", os.cpu_count() or 1))
+OCR_MAX_PENDING = int(os.environ.get("OCR_MAX_PENDING", OCR_WORKERS * 4))
+OCR_TIMEOUT = float(os.environ.get("OCR_TIMEOUT", 30))
+
+
+class OCRBusy(Exception):
+    pass
+
+
+# "--psm 7 -c tessedit_char_whitelist=0123" as engine settings; None for flags an in-process
+# engine cannot take, which then go through pytesseract
+def parse_config(config):
+    psm, variables = 3, {}
+    args = shlex.split(config or "")
+    while args:
+        flag = args.pop(0)
+        if flag == "--psm" and args:
+            psm = int(args.pop(0))
+        elif flag == "-c" and args and "=" in args[0]:
+            name, value = args.pop(0).split("=", 1)
+            variables[name] = value
+        else:
+            return None
+    return psm, variables
+
+
+# A fixed number of warm engines, one set per (lang, config) so settings never leak between
+# callers. At most `size` recognitions run at once (tesserocr releases the GIL while it
+# works); further callers wait for an engine, and beyond max_pending waiting or running
+# callers the pool raises OCRBusy instead of queueing without bound. Images are handed to
+# the engine in memory.
+class EnginePool:
+    def __init__(self, size=OCR_WORKERS, max_pending=OCR_MAX_PENDING, timeout=OCR_TIMEOUT, backend=OCR_BACKEND):
+        self.size = size
+        self.timeout = timeout
+        self.backend = backend
+        self.running = threading.Semaphore(size)
+        self.slots = threading.BoundedSemaphore(max_pending)
+        self.idle = {}
+        self.created = 0
+        self.lock = threading.Lock()
+        self.wait = deque(maxlen=1024)
+        self.run = deque(maxlen=1024)
+        self.count = 0
+        self.rejected = 0
+
+    def _checkout(self, lang, config, settings):
+        with self.lock:
+            engines = self.idle.get((lang, config))
+            if engines:
+                return engines.pop()
+            self.created += 1
+        psm, variables = settings
+        return tesserocr.PyTessBaseAPI(lang=lang, psm=psm, variables=variables)
+
+    def _checkin(self, lang, config, engine):
+        with self.lock:
+            self.idle.setdefault((lang, config), []).append(engine)
+
+    def _recognize(self, image, lang, config):
+        settings = parse_config(config) if self.backend == "tesserocr" else None
+        if settings is None:
+            return pytesseract.image_to_string(image, lang=lang, config=config)
+        engine = self._checkout(lang, config, settings)
+        try:
+            engine.SetImage(image)
+            return engine.GetUTF8Text()
+        finally:
+            # Drops the image and results; the loaded model stays for the next call
+            engine.Clear()
+            self._checkin(lang, config, engine)
+
+    def image_to_string(self, image, lang="eng", config=""):
+        if not self.slots.acquire(blocking=False):
+            with self.lock:
+                self.rejected += 1
+            raise OCRBusy("OCR queue is full")
+        try:
+            queued = time.perf_counter()
+            if not self.running.acquire(timeout=self.timeout):
+                with self.lock:
+                    self.rejected += 1
+                raise OCRBusy("timed out waiting for an OCR engine")
+            started = time.perf_counter()
+            try:
+                return self._recognize(image, lang, config)
+            finally:
+                self.running.release()
+                finished = time.perf_counter()
+                with self.lock:
+                    self.count += 1
+                    self.wait.append(started - queued)
+                    self.run.append(finished - started)
+        finally:
+            self.slots.release()
+
+    def close(self):
+        with self.lock:
+            engines = [engine for idle in self.idle.values() for engine in idle]
+            self.idle.clear()
+        for engine in engines:
+            engine.End()
+
+    def stats(self):
+        with self.lock:
+            return {
+                "backend": self.backend,
+                "size": self.size,
+                "engines": self.created,
+                "count": self.count,
+                "rejected": self.rejected,
+                "wait_p50": percentile(self.wait, 50),
+                "run_p50": percentile(self.run, 50),
+                "run_p95": percentile(self.run, 95),
+            }
+
+
+ocr_pool = EnginePool()
+
+
+# Drop-in for pytesseract.image_to_string
+def image_to_string(image, lang="eng", config=""):
+    return ocr_pool.image_to_string(image, lang=lang, config=config)
@@ -0,0 +1,88 @@
+import json
+import os
+import re
+import threading
+import time
+from collections import OrderedDict
+
+WHITESPACE = re.compile(r"\s+")
+TRAILING_PUNCTUATION = re.compile(r"[\s?!.]+$")
+
+
+# "What is a good debt-to-income ratio?" and "what is a good  debt-to-income ratio" share an entry
+def normalize_prompt(prompt):
+    text = WHITESPACE.sub(" ", prompt.strip().lower())
+    text = text.replace("’", "'").replace("“", '"').replace("”", '"')
+    return TRAILING_PUNCTUATION.sub("", text)
+
+
+# LRU + TTL cache of complete streamed answers, stored as their original chunks so a hit
+# replays through st.write_stream exactly like a live response
+class ResponseCache:
+    def __init__(self, max_entries=512, ttl=3600, clock=time.monotonic):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.clock = clock
+        self.entries = OrderedDict()
+        self.lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.bypassed = 0
+
+    def key(self, prompt, model, params=None):
+        return json.dumps([normalize_prompt(prompt), model, params or {}], sort_keys=True)
+
+    def get(self, key):
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is not None and entry[0] > self.clock():
+                self.entries.move_to_end(key)
+                self.hits += 1
+                return entry[1]
+            if entry is not None:
+                del self.entries[key]
+            self.misses += 1
+            return None
+
+    def put(self, key, chunks):
+        with self.lock:
+            self.entries[key] = (self.clock() + self.ttl, tuple(chunks))
+            self.entries.move_to_end(key)
+            while len(self.entries) > self.max_entries:
+                self.entries.popitem(last=False)
+
+    # Conversations that depend on earlier turns call this instead of stream()
+    def bypass(self):
+        with self.lock:
+            self.bypassed += 1
+
+    def stream(self, key, produce):
+        chunks = self.get(key)
+        if chunks is not None:
+            yield from chunks
+            return
+        collected = []
+        source = produce()
+        for chunk in source:
+            collected.append(chunk)
+            yield chunk
+        # Cancelled or timed-out streams end quietly, so check before storing a partial answer
+        if getattr(source, "completed", True):
+            self.put(key, collected)
+
+    def stats(self):
+        with self.lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries": len(self.entries),
+                "hits": self.hits,
+                "misses": self.misses,
+                "bypassed": self.bypassed,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+            }
+
+
+response_cache = ResponseCache(
+    max_entries=int(os.environ.get("RESPONSE_CACHE_SIZE", 512)),
+    ttl=float(os.environ.get("RESPONSE_CACHE_TTL", 3600)),
+)
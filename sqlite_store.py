@@ -0,0 +1,50 @@
+import os
+import sqlite3
+import threading
+
+_initialized = set()
+_init_lock = threading.Lock()
+
+
+# WAL lets readers keep going while a writer commits; the schema is applied once per process
+def connect(path, schema):
+    conn = sqlite3.connect(path, timeout=30, isolation_level=None)
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute("PRAGMA synchronous=NORMAL")
+    if path not in _initialized:
+        with _init_lock:
+            conn.executescript(schema)
+            _initialized.add(path)
+    return conn
+
+
+# Each write runs in its own IMMEDIATE transaction, so concurrent sessions queue on the
+# SQLite write lock instead of overwriting each other's changes
+class transaction:
+    def __init__(self, path, schema):
+        self.path = path
+        self.schema = schema
+
+    def __enter__(self):
+        self.conn = connect(self.path, self.schema)
+        self.conn.execute("BEGIN IMMEDIATE")
+        return self.conn
+
+    def __exit__(self, exc_type, exc, tb):
+        try:
+            self.conn.execute("ROLLBACK" if exc_type else "COMMIT")
+        finally:
+            self.conn.close()
+
+
+# SQLite in WAL mode commits into <path>-wal before checkpointing into the main file,
+# so both files take part in the signature
+def store_signature(path):
+    signature = []
+    for name in (path, f"{path}-wal"):
+        try:
+            stat = os.stat(name)
+            signature.append((stat.st_mtime_ns, stat.st_size))
+        except FileNotFoundError:
+            signature.append(None)
+    return tuple(signature)
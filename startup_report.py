@@ -0,0 +1,83 @@
+import argparse
+import json
+import subprocess
+import sys
+from pathlib import Path
+
+PAGES = ["home.py", "finance_help.py", "ml.py", "tax_estimator.py", "chatbot.py", "humanhelp.py", "taxfilling.py"]
+
+# Runs one page in bare mode (no server), which is what a first navigation executes.
+# Pages that need credentials may fail part way; their imports up to that point still count.
+BOOTSTRAP = """
+import runpy, sys
+try:
+    runpy.run_path(sys.argv[1], run_name="__main__")
+except BaseException as e:
+    print(f"page raised {type(e).__name__}: {e}")
+"""
+
+
+def parse_importtime(stderr):
+    modules = {}
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "[us]" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:"):].split("|", 2)
+        modules[name.strip()] = {
+            "self_ms": int(self_us) / 1000,
+            "cumulative_ms": int(cumulative_us) / 1000,
+            "top_level": not name[1:].startswith(" "),
+        }
+    return modules
+
+
+def measure(page, python=sys.executable):
+    result = subprocess.run(
+        [python, "-X", "importtime", "-c", BOOTSTRAP, page],
+        capture_output=True, text=True, cwd=Path(page).resolve().parent,
+    )
+    modules = parse_importtime(result.stderr)
+    top = sorted((name for name, m in modules.items() if m["top_level"]), key=lambda name: -modules[name]["cumulative_ms"])
+    return {
+        "page": page,
+        "total_ms": round(sum(m["self_ms"] for m in modules.values()), 1),
+        "modules": len(modules),
+        "top_imports": [[name, round(modules[name]["cumulative_ms"], 1)] for name in top[:10]],
+    }
+
+
+def compare(report, baseline, threshold):
+    regressions = []
+    for page, entry in report.items():
+        before = baseline.get(page)
+        if before and entry["total_ms"] > before["total_ms"] * (1 + threshold):
+            regressions.append(f"{page}: {before['total_ms']:.0f} ms -> {entry['total_ms']:.0f} ms")
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Report import-time cost of each Streamlit page (python -X importtime).")
+    parser.add_argument("pages", nargs="*", default=PAGES)
+    parser.add_argument("--json", help="write the report to this file")
+    parser.add_argument("--baseline", help="earlier --json report to compare against")
+    parser.add_argument("--threshold", type=float, default=0.2, help="allowed relative slowdown before flagging (default 0.2)")
+    args = parser.parse_args(argv)
+
+    report = {}
+    for page in args.pages:
+        entry = measure(page)
+        report[page] = entry
+        heaviest = ", ".join(f"{name} {ms:.0f}ms" for name, ms in entry["top_imports"][:5])
+        print(f"{page:<20} {entry['total_ms']:>8.0f} ms  {entry['modules']:>5} modules  {heaviest}")
+    if args.json:
+        Path(args.json).write_text(json.dumps(report, indent=2))
+    if args.baseline:
+        regressions = compare(report, json.loads(Path(args.baseline).read_text()), args.threshold)
+        for line in regressions:
+            print(f"REGRESSION {line}")
+        return 1 if regressions else 0
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,134 @@
+import threading
+import time
+from collections import deque
+
+from context_window import count_tokens
+from latency import percentile
+from metrics import count, observe
+
+_recent = deque(maxlen=512)
+_recent_lock = threading.Lock()
+
+
+class StreamMetrics:
+    def __init__(self, name):
+        self.name = name
+        self.started = time.perf_counter()
+        self.first_token = None
+        self.finished = None
+        self.chunks = 0
+        self.tokens = 0
+        self.status = "running"
+
+    @property
+    def ttft(self):
+        return None if self.first_token is None else self.first_token - self.started
+
+    @property
+    def total(self):
+        return None if self.finished is None else self.finished - self.started
+
+    @property
+    def tokens_per_second(self):
+        if self.first_token is None or self.finished is None or self.finished <= self.first_token:
+            return None
+        return self.tokens / (self.finished - self.first_token)
+
+    def as_dict(self):
+        return {
+            "name": self.name,
+            "status": self.status,
+            "ttft": self.ttft,
+            "total": self.total,
+            "chunks": self.chunks,
+            "tokens": self.tokens,
+            "tokens_per_second": self.tokens_per_second,
+        }
+
+
+# Wraps a chunk iterator from any backend. Chunks are collected in a list (join once at the
+# end), cancel() or an expired deadline stops the stream between chunks, and the upstream
+# response is always closed so an abandoned generation gives its connection back.
+# source may also be a function of the timeout in seconds, e.g.
+# lambda timeout: backend.stream(messages, timeout=timeout); the backend's own waits then
+# share the deadline, so a request that stalls before its next chunk still ends on time.
+class ManagedStream:
+    def __init__(self, source, name="", deadline=None, close=None):
+        self.metrics = StreamMetrics(name)
+        self.deadline = None if deadline is None else self.metrics.started + deadline
+        if callable(source):
+            source = source(deadline)
+        self.source = source
+        self.close_source = close or getattr(source, "close", None)
+        self.cancelled = threading.Event()
+        self.parts = []
+        self.completed = False
+
+    def cancel(self):
+        self.cancelled.set()
+
+    @property
+    def text(self):
+        return "".join(self.parts)
+
+    def __iter__(self):
+        metrics = self.metrics
+        status = "cancelled"
+        try:
+            for chunk in self.source:
+                if self.cancelled.is_set():
+                    break
+                if self.deadline is not None and time.perf_counter() > self.deadline:
+                    status = "timeout"
+                    break
+                if not chunk:
+                    continue
+                if metrics.first_token is None:
+                    metrics.first_token = time.perf_counter()
+                metrics.chunks += 1
+                self.parts.append(chunk)
+                yield chunk
+            else:
+                status = "completed"
+                self.completed = True
+        except Exception:
+            # The backend gave up because the deadline passed; end like any other timeout
+            if self.deadline is not None and time.perf_counter() >= self.deadline:
+                status = "timeout"
+                return
+            status = "error"
+            raise
+        finally:
+            # Also runs when the consumer stops early, e.g. Streamlit ending the script run
+            if self.close_source is not None:
+                self.close_source()
+            metrics.finished = time.perf_counter()
+            metrics.tokens = count_tokens(self.text)
+            metrics.status = status
+            with _recent_lock:
+                _recent.append(metrics.as_dict())
+            record_llm_call(metrics)
+
+
+# Feeds the app-wide metrics (a no-op unless they are enabled)
+def record_llm_call(stream_metrics):
+    count("llm_requests", backend=stream_metrics.name, status=stream_metrics.status)
+    observe("llm_ttft", stream_metrics.ttft, backend=stream_metrics.name)
+    observe("llm_stream", stream_metrics.total, backend=stream_metrics.name)
+
+
+def recent_metrics():
+    with _recent_lock:
+        return list(_recent)
+
+
+def stream_stats():
+    records = recent_metrics()
+    return {
+        "requests": len(records),
+        "cancelled": sum(record["status"] in ("cancelled", "timeout") for record in records),
+        "ttft_p50": percentile([record["ttft"] for record in records], 50),
+        "ttft_p95": percentile([record["ttft"] for record in records], 95),
+        "total_p50": percentile([record["total"] for record in records], 50),
+        "tokens_per_second_p50": percentile([record["tokens_per_second"] for record in records], 50),
+    }
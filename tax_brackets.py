@@ -0,0 +1,97 @@
+import numpy as np
+
+FILING_STATUSES = ["Single", "Married Filing Jointly", "Married Filing Separately", "Head of Household"]
+RATES = [0.10, 0.12, 0.22, 0.24, 0.32, 0.35, 0.37]
+
+# Lower bound of each federal bracket above the first, by tax year and filing status
+THRESHOLDS = {
+    2021: {
+        "Single": [9950, 40525, 86375, 164925, 209425, 523600],
+        "Married Filing Jointly": [19900, 81050, 172750, 329850, 418850, 628300],
+        "Married Filing Separately": [9950, 40525, 86375, 164925, 209425, 314150],
+        "Head of Household": [14200, 54200, 86350, 164900, 209400, 523600],
+    },
+    2022: {
+        "Single": [10275, 41775, 89075, 170050, 215950, 539900],
+        "Married Filing Jointly": [20550, 83550, 178150, 340100, 431900, 647850],
+        "Married Filing Separately": [10275, 41775, 89075, 170050, 215950, 323925],
+        "Head of Household": [14650, 55900, 89050, 170050, 215950, 539900],
+    },
+    2023: {
+        "Single": [11000, 44725, 95375, 182100, 231250, 578125],
+        "Married Filing Jointly": [22000, 89450, 190750, 364200, 462500, 693750],
+        "Married Filing Separately": [11000, 44725, 95375, 182100, 231250, 346875],
+        "Head of Household": [15700, 59850, 95350, 182100, 231250, 578100],
+    },
+    2024: {
+        "Single": [11600, 47150, 100525, 191950, 243725, 609350],
+        "Married Filing Jointly": [23200, 94300, 201050, 383900, 487450, 731200],
+        "Married Filing Separately": [11600, 47150, 100525, 191950, 243725, 365600],
+        "Head of Household": [16550, 63100, 100500, 191950, 243700, 609350],
+    },
+}
+TAX_YEARS = sorted(THRESHOLDS)
+
+
+# One schedule per (year, status): bracket floors, rates, and the tax owed on everything
+# below each floor, so the tax on any income is base[i] + (income - floor[i]) * rate[i]
+class BracketTable:
+    def __init__(self, thresholds, rates=RATES):
+        self.lower = np.array([0.0, *thresholds])
+        self.rates = np.array(rates)
+        widths = np.diff(self.lower)
+        self.base = np.concatenate([[0.0], np.cumsum(widths * self.rates[:-1])])
+
+    # NaN incomes give NaN for all three results rather than a top-bracket marginal rate
+    def compute(self, incomes):
+        incomes = np.maximum(np.asarray(incomes, dtype=float), 0.0)
+        index = np.searchsorted(self.lower, incomes, side="right") - 1
+        tax = self.base[index] + (incomes - self.lower[index]) * self.rates[index]
+        marginal = self.rates[index]
+        # Zero income sits in the 10% bracket for marginal-rate purposes, with 0% effective
+        with np.errstate(divide="ignore", invalid="ignore"):
+            effective = np.where(incomes > 0, tax / incomes, 0.0)
+        missing = np.isnan(incomes)
+        if missing.any():
+            marginal = np.where(missing, np.nan, marginal)
+            effective = np.where(missing, np.nan, effective)
+        return tax, marginal, effective
+
+
+TABLES = {
+    (year, status): BracketTable(thresholds)
+    for year, statuses in THRESHOLDS.items()
+    for status, thresholds in statuses.items()
+}
+
+
+def bracket_table(year, status):
+    try:
+        return TABLES[(int(year), status)]
+    except KeyError:
+        raise ValueError(f"No tax brackets for {year} / {status}") from None
+
+
+# Tax, marginal rate and effective rate for a scalar or an array of taxable incomes;
+# scalars come back as floats, arrays as arrays of the same shape
+def compute_tax(incomes, year=2021, status="Single"):
+    tax, marginal, effective = bracket_table(year, status).compute(incomes)
+    if np.ndim(incomes) == 0:
+        return float(tax), float(marginal), float(effective)
+    return tax, marginal, effective
+
+
+# Same as compute_tax but with a filing status per income; one vectorized pass per status
+def compute_tax_by_status(incomes, statuses, year=2021):
+    incomes = np.asarray(incomes, dtype=float)
+    statuses = np.asarray(statuses)
+    tax = np.zeros_like(incomes)
+    marginal = np.zeros_like(incomes)
+    effective = np.zeros_like(incomes)
+    unknown = ~np.isin(statuses, FILING_STATUSES)
+    if unknown.any():
+        raise ValueError(f"Unknown filing status: {statuses[unknown][0]}")
+    for status in np.unique(statuses):
+        mask = statuses == status
+        tax[mask], marginal[mask], effective[mask] = bracket_table(year, status).compute(incomes[mask])
+    return tax, marginal, effective
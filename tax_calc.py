@@ -0,0 +1,71 @@
+import numpy as np
+import pandas as pd
+
+from tax_brackets import compute_tax, compute_tax_by_status
+
+# Deduction categories shown on the Tax Estimator page and their column names in batch files
+DEDUCTION_CATEGORIES = {
+    "Operational Costs": "operational_costs",
+    "Salaries and Wages": "salaries_and_wages",
+    "Rent": "rent",
+    "Supplies": "supplies",
+    "Utilities": "utilities",
+}
+
+
+# The Tax Estimator page's math, written over arrays so one call handles a single business
+# on the page or a whole chunk of a batch file. tax_rate is a percentage, as on the page.
+def estimate_taxes(annual_income, tax_rate, total_deductions, other_tax_credits):
+    annual_income = np.asarray(annual_income, dtype=float)
+    rate = np.asarray(tax_rate, dtype=float) / 100
+    total_deductions = np.asarray(total_deductions, dtype=float)
+    taxable_income = np.maximum(annual_income - total_deductions, 0)
+    liability = np.maximum(taxable_income * rate - np.asarray(other_tax_credits, dtype=float), 0)
+    # Savings are only reported when deductions were entered
+    savings = np.where(total_deductions > 0, annual_income * rate - liability, np.nan)
+    return taxable_income, liability, savings
+
+
+def deduction_savings(deductions, tax_rate):
+    return {category: amount * (tax_rate / 100) for category, amount in deductions.items()}
+
+
+REQUIRED_COLUMNS = ["annual_income", "tax_rate"]
+# Amount columns a batch file may leave out, or leave blank in some rows; both count as zero
+OPTIONAL_COLUMNS = [*DEDUCTION_CATEGORIES.values(), "other_tax_credits"]
+
+
+# A filing_status column with blank cells taken as the default status
+def filing_statuses(column, default="Single"):
+    statuses = column.fillna(default).astype(str).str.strip()
+    return statuses.mask(statuses == "", default).to_numpy()
+
+
+# Scores a DataFrame of businesses. Missing deduction or credit columns, and blank cells in
+# them, count as zero. With bracket_year set, the progressive tax is added using each row's
+# filing_status column, or the given filing_status when the column is absent or the row's
+# cell is blank.
+def score_frame(df, bracket_year=None, filing_status="Single"):
+    zeros = np.zeros(len(df))
+
+    def optional(column):
+        return df[column].fillna(0).to_numpy(dtype=float) if column in df else zeros
+
+    total_deductions = sum(optional(column) for column in DEDUCTION_CATEGORIES.values())
+    credits = optional("other_tax_credits")
+    taxable_income, liability, savings = estimate_taxes(df["annual_income"], df["tax_rate"], total_deductions, credits)
+    result = pd.DataFrame({
+        "total_deductions": total_deductions,
+        "taxable_income": taxable_income,
+        "estimated_tax_liability": liability,
+        "savings_from_deductions": savings,
+    }, index=df.index)
+    if bracket_year is not None:
+        if "filing_status" in df:
+            tax, marginal, effective = compute_tax_by_status(taxable_income, filing_statuses(df["filing_status"], filing_status), bracket_year)
+        else:
+            tax, marginal, effective = compute_tax(taxable_income, bracket_year, filing_status)
+        result["progressive_tax"] = tax
+        result["marginal_rate"] = marginal
+        result["effective_rate"] = effective
+    return result
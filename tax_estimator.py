@@ -1,6 +1,14 @@
 import streamlit as st
-import numpy as np
-import matplotlib.pyplot as plt
+import pandas as pd
+import altair as alt
+from tax_brackets import FILING_STATUSES, TAX_YEARS, compute_tax
+from tax_calc import DEDUCTION_CATEGORIES, estimate_taxes, deduction_savings
+from fragments import PageTimer, timed_fragment
+import metrics
+
+# Fragment timings are labelled with the session's page, so name it before any fragment runs
+metrics.set_page("tax_estimator")
+page_timer = PageTimer("tax_estimator")
 # st.set_page_config(page_title="Small Business Tax Deduction Estimator", layout="centered")
 st.title("💼 Small Business Tax Deduction Estimator")
 st.markdown(
@@ -21,13 +29,7 @@ with col2:
     deductible_expenses = st.number_input("Total Deductible Expenses ($)", min_value=0.0, format="%.2f", help="Sum of all deductible expenses.")
     other_tax_credits = st.number_input("Other Tax Credits ($)", min_value=0.0, format="%.2f", help="Other available tax credits.")
 st.header("Deduction Categories")
-deductions = {
-    "Operational Costs": 0.0,
-    "Salaries and Wages": 0.0,
-    "Rent": 0.0,
-    "Supplies": 0.0,
-    "Utilities": 0.0
-}
+deductions = {category: 0.0 for category in DEDUCTION_CATEGORIES}
 for category in deductions:
     deductions[category] = st.number_input(f"{category} ($)", min_value=0.0, format="%.2f", help=f"Enter total amount spent on {category.lower()}.")
 
@@ -36,57 +38,54 @@ st.write(f"**Total Deductions:** ${total_deductions:,.2f}")
 
 st.header("Tax Liability and Savings")
 
-taxable_income = max(annual_income - total_deductions, 0)
-estimated_tax_liability = (taxable_income * (tax_rate / 100)) - other_tax_credits
-estimated_tax_liability = max(estimated_tax_liability, 0)  # Ensure no negative tax liability
+# Same code path as batch_tax.py, applied to a single business
+taxable_income, estimated_tax_liability, savings_from_deductions = map(
+    float, estimate_taxes(annual_income, tax_rate, total_deductions, other_tax_credits)
+)
 
 st.subheader("Results")
 
 st.write(f"**Taxable Income after Deductions:** ${taxable_income:,.2f}")
 st.write(f"**Estimated Tax Liability:** ${estimated_tax_liability:,.2f}")
 if total_deductions > 0:
-    savings_from_deductions = annual_income * (tax_rate / 100) - estimated_tax_liability
     st.write(f"**Potential Tax Savings from Deductions:** ${savings_from_deductions:,.2f}")
 else:
     st.write("No deductions entered; add deductible expenses to estimate potential tax savings.")
 
 st.subheader("Tax Savings Breakdown by Category")
-category_contribution = {category: deductions[category] * (tax_rate / 100) for category in deductions}
-
-category_data = list(category_contribution.values())
-category_labels = list(category_contribution.keys())
-category_data.sort(reverse=True)
-category_labels = [x for _, x in sorted(zip(category_data, category_labels), reverse=True)]
+category_contribution = deduction_savings(deductions, tax_rate)
 
-# Plot the tax savings breakdown
-fig, ax = plt.subplots(figsize=(10, 6))
-ax.barh(category_labels, [category_contribution[category] for category in category_labels], color="skyblue")
-ax.set_xlabel("Tax Savings ($)")
-ax.set_title("Contribution of Each Deduction Category to Tax Savings")
-st.pyplot(fig)
+# Plot the tax savings breakdown, largest first (drawn client-side by Vega-Lite)
+category_df = pd.DataFrame({"Category": list(category_contribution), "Tax Savings ($)": list(category_contribution.values())})
+category_chart = alt.Chart(category_df, title="Contribution of Each Deduction Category to Tax Savings").mark_bar(color="skyblue").encode(
+    x=alt.X("Tax Savings ($):Q"),
+    y=alt.Y("Category:N", sort="-x", title=None),
+)
+st.altair_chart(category_chart, use_container_width=True)
 
 # Tax Bracket Calculation (Optional)
-st.header("Tax Bracket Calculator (Optional)")
-
-# User can opt for a progressive tax bracket calculator
-apply_tax_bracket = st.checkbox("Apply Progressive Tax Brackets")
-if apply_tax_bracket:
-    st.write("**Progressive Tax Bracket Estimation**")
-    brackets = [(0, 9950, 0.10), (9950, 40525, 0.12), (40525, 86375, 0.22), (86375, 164925, 0.24), (164925, 209425, 0.32), (209425, 523600, 0.35), (523600, np.inf, 0.37)]
-
-    def calculate_bracket_tax(income):
-        tax = 0
-        for lower, upper, rate in brackets:
-            if income > lower:
-                taxable = min(upper, income) - lower
-                tax += taxable * rate
-            else:
-                break
-        return tax
-
-    # Estimate tax using progressive brackets
-    progressive_tax = calculate_bracket_tax(taxable_income)
-    st.write(f"**Estimated Tax with Progressive Tax Brackets:** ${progressive_tax:,.2f}")
+# A fragment: the checkbox, year and status rerun only this section, using the taxable
+# income from the last full run
+@timed_fragment("brackets")
+def bracket_section(taxable_income):
+    st.header("Tax Bracket Calculator (Optional)")
+
+    # User can opt for a progressive tax bracket calculator
+    apply_tax_bracket = st.checkbox("Apply Progressive Tax Brackets")
+    if apply_tax_bracket:
+        st.write("**Progressive Tax Bracket Estimation**")
+        bracket_col1, bracket_col2 = st.columns(2)
+        with bracket_col1:
+            bracket_year = st.selectbox("Tax Year", TAX_YEARS, index=TAX_YEARS.index(2021))
+        with bracket_col2:
+            filing_status = st.selectbox("Filing Status", FILING_STATUSES)
+
+        # Estimate tax using progressive brackets
+        progressive_tax, marginal_rate, effective_rate = compute_tax(taxable_income, bracket_year, filing_status)
+        st.write(f"**Estimated Tax with Progressive Tax Brackets:** ${progressive_tax:,.2f}")
+        st.write(f"**Marginal Rate:** {marginal_rate:.0%} | **Effective Rate:** {effective_rate:.2%}")
+
+bracket_section(taxable_income)
 
 # Summary Section
 st.markdown(
@@ -95,3 +94,5 @@ st.markdown(
     This tool helps small business owners estimate their tax liabilities while considering deductible expenses and tax credits. By providing a breakdown of deductions and an optional progressive tax bracket estimator, businesses can gain better insights into potential tax savings. Remember to consult a tax professional to ensure accuracy for your specific situation.
     """
 )
+
+page_timer.finish()
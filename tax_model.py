@@ -0,0 +1,100 @@
+import os
+import re
+import sys
+import threading
+from pathlib import Path
+
+import pandas as pd
+
+from lazy_imports import lazy_import
+
+# scikit-learn and joblib only load when a model is trained or read from disk
+joblib = lazy_import("joblib")
+ensemble = lazy_import("sklearn.ensemble")
+model_selection = lazy_import("sklearn.model_selection")
+
+# Versioned artifacts live here as tax_liability_v<N>.joblib; the highest N wins
+MODEL_DIR = Path("models")
+MODEL_NAME = "tax_liability"
+FEATURES = ['wages', 'federal_tax_withheld', 'social_security_wages', 'medicare_wages', 'total_income']
+
+sample_data = pd.DataFrame({
+    'wages': [50000, 60000, 75000, 85000],
+    'federal_tax_withheld': [5000, 6000, 7500, 8500],
+    'social_security_wages': [50000, 60000, 75000, 85000],
+    'medicare_wages': [50000, 60000, 75000, 85000],
+    'total_income': [150000, 180000, 225000, 255000],
+    'tax_liability': [8000, 9000, 11000, 12000]
+})
+
+_lock = threading.Lock()
+_loaded = {"path": None, "model": None}
+
+
+def train_model(data=sample_data):
+    X = data[FEATURES]
+    y = data['tax_liability']
+    X_train, X_test, y_train, y_test = model_selection.train_test_split(X, y, test_size=0.25, random_state=42)
+    model = ensemble.RandomForestRegressor(n_estimators=100, random_state=42)
+    model.fit(X_train, y_train)
+    return model
+
+
+def artifact_versions(model_dir=MODEL_DIR):
+    pattern = re.compile(rf"{MODEL_NAME}_v(\d+)\.joblib$")
+    versions = {}
+    for path in Path(model_dir).glob(f"{MODEL_NAME}_v*.joblib"):
+        match = pattern.search(path.name)
+        if match:
+            versions[int(match.group(1))] = path
+    return versions
+
+
+def latest_artifact(model_dir=MODEL_DIR):
+    versions = artifact_versions(model_dir)
+    return versions[max(versions)] if versions else None
+
+
+def save_model(model, model_dir=MODEL_DIR):
+    model_dir = Path(model_dir)
+    model_dir.mkdir(parents=True, exist_ok=True)
+    versions = artifact_versions(model_dir)
+    version = max(versions) + 1 if versions else 1
+    path = model_dir / f"{MODEL_NAME}_v{version}.joblib"
+    # Write next to the target and rename so readers never see a half-written file; the temp
+    # name is per process and thread so servers starting cold never write the same file
+    tmp_path = path.with_name(f"{path.name}.{os.getpid()}.{threading.get_ident()}.tmp")
+    joblib.dump(model, tmp_path)
+    tmp_path.replace(path)
+    return path
+
+
+def retrain(model_dir=MODEL_DIR):
+    path = save_model(train_model(), model_dir)
+    with _lock:
+        _loaded["path"] = path
+        _loaded["model"] = joblib.load(path)
+    return path
+
+
+# Shared by every session in the process; trains only when no artifact exists yet,
+# and picks up a newer version written by `python tax_model.py retrain`
+def get_model(model_dir=MODEL_DIR):
+    path = latest_artifact(model_dir)
+    if path is not None and path == _loaded["path"]:
+        return _loaded["model"]
+    with _lock:
+        path = latest_artifact(model_dir)
+        if path is None:
+            path = save_model(train_model(), model_dir)
+        if path != _loaded["path"]:
+            _loaded["model"] = joblib.load(path)
+            _loaded["path"] = path
+        return _loaded["model"]
+
+
+if __name__ == "__main__":
+    if len(sys.argv) > 1 and sys.argv[1] == "retrain":
+        print(f"Saved {retrain()}")
+    else:
+        print("usage: python tax_model.py retrain")
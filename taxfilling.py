@@ -1,47 +1,38 @@
-import pytesseract
-from PIL import Image
 import pandas as pd
-from sklearn.ensemble import RandomForestRegressor
-from sklearn.model_selection import train_test_split
-from sklearn.metrics import mean_absolute_error
-import re
 import streamlit as st
-from pdf2image import convert_from_path
+from tax_model import get_model
+from ocr_cache import cache_key, ocr_cache
+from w2_extract import DEFAULT_TEMPLATE, ROI_DPI, extract_document
+from ocr_engine import OCRBusy
+import metrics
 
-sample_data = pd.DataFrame({
-    'wages': [50000, 60000, 75000, 85000],
-    'federal_tax_withheld': [5000, 6000, 7500, 8500],
-    'social_security_wages': [50000, 60000, 75000, 85000],
-    'medicare_wages': [50000, 60000, 75000, 85000],
-    'total_income': [150000, 180000, 225000, 255000],
-    'tax_liability': [8000, 9000, 11000, 12000]
-})
+# Part of the OCR cache key, so changing any of these re-runs extraction; bump parser when
+# the way values are read changes, so results cached on disk are not reused
+OCR_SETTINGS = {"dpi": ROI_DPI, "first_page": 1, "lang": "eng", "template": DEFAULT_TEMPLATE, "text_layer": True, "parser": 3}
 
-X = sample_data[['wages', 'federal_tax_withheld', 'social_security_wages', 'medicare_wages', 'total_income']]
-y = sample_data['tax_liability']
-X_train, X_test, y_train, y_test = train_test_split(X, y, test_size=0.25, random_state=42)
+SOURCE_NOTES = {
+    "text_layer": "Read from the text embedded in the PDF.",
+    "roi": "Read with OCR from the W-2 boxes.",
+    "roi+full_page": "Read with OCR from the W-2 boxes and the full page.",
+    "full_page": "Read with OCR from the full page.",
+}
 
-model = RandomForestRegressor(n_estimators=100, random_state=42)
-model.fit(X_train, y_train)
-
-def extract_w2_data_from_pdf(pdf_path):
+# Uses the PDF's own text when it has any, leaving fields it lacks empty; otherwise OCRs the
+# template's boxes at ROI_DPI in grayscale, falling back to full-page OCR for any box it
+# cannot read. Returns the values and
+# the path taken, which is cached with them.
+@metrics.timed("ocr_extract")
+def extract_w2_data_from_pdf(pdf_data):
     try:
-        images = convert_from_path(pdf_path)
-        text = pytesseract.image_to_string(images[0])
-        w2_data = {
-            'wages': re.search(r'Income.*\$(\d{1,3}(,\d{3})*(\.\d{2})?)', text),
-            'federal_tax_withheld': re.search(r'Federal.*\$(\d{1,3}(,\d{3})*(\.\d{2})?)', text),
-            'social_security_wages': re.search(r'Social Security Wages.*\$(\d{1,3}(,\d{3})*(\.\d{2})?)', text),
-            'medicare_wages': re.search(r'Medicare Wages.*\$(\d{1,3}(,\d{3})*(\.\d{2})?)', text)
-        }
-        parsed_data = {
-            k: float(v.group(1).replace(',', '')) if v else 0.0 for k, v in w2_data.items()
-        }
-        if not all(parsed_data.values()):
-            st.warning("Warning: Some fields could not be extracted. Verify the uploaded image.")
-        
-        return parsed_data
+        parsed_data, source = extract_document(pdf_data, OCR_SETTINGS["template"], OCR_SETTINGS["dpi"], OCR_SETTINGS["first_page"], OCR_SETTINGS["lang"])
+        metrics.count("w2_documents", source=source)
+        return parsed_data, source
+    except OCRBusy:
+        metrics.count("ocr_busy")
+        st.error("Too many documents are being read right now, please try again in a moment.")
+        return None
     except Exception as e:
+        metrics.count("ocr_failures")
         st.error(f"Error extracting data from W-2: {e}")
         return None
 
@@ -54,17 +45,25 @@ def predict_tax_liability(data, model):
     input_data = prepare_data(data)
     return model.predict(input_data)[0]
 
+metrics.set_page("taxfilling")
+
 st.title("Automated Tax Filing Assistance with W-2 Form")
 st.write("Upload your W-2 for automated calculate estimated tax liability and adjust for filing specifics.")
 
 uploaded_file = st.file_uploader("Upload your W-2 form (PDF format)", type="pdf")
 if uploaded_file is not None:
-    with open("temp_w2.pdf", "wb") as f:
-        f.write(uploaded_file.getbuffer())
-    extracted_data = extract_w2_data_from_pdf("temp_w2.pdf")
+    # getbuffer() is a zero-copy view of the upload; it is hashed and piped to the rasterizer as-is.
+    # OCR runs once per document and settings; widget changes below reuse the cached result
+    pdf_data = uploaded_file.getbuffer()
+    extracted = ocr_cache.get_or_compute(cache_key(pdf_data, OCR_SETTINGS), lambda: extract_w2_data_from_pdf(pdf_data))
+    extracted_data, source = extracted if extracted else (None, None)
+    if extracted_data and not all(extracted_data.values()):
+        st.warning("Warning: Some fields could not be extracted. Verify the uploaded image.")
     if extracted_data:
         st.subheader("Extracted W-2 Data")
         st.write(extracted_data)
+        st.caption(SOURCE_NOTES.get(source, ""))
+        # Fields the text layer did not show start empty for the user to fill in
         wages = st.number_input("Wages", value=extracted_data['wages'])
         federal_tax_withheld = st.number_input("Federal Tax Withheld", value=extracted_data['federal_tax_withheld'])
         social_security_wages = st.number_input("Social Security Wages", value=extracted_data['social_security_wages'])
@@ -80,12 +79,18 @@ if uploaded_file is not None:
         filing_status = st.selectbox("Filing Status", ["Single", "Married Filing Jointly", "Head of Household"])
         filing_adjustment = 0.9 if filing_status == "Married Filing Jointly" else 1.1 if filing_status == "Head of Household" else 1.0
         dependents_adjustment = max(1 - (dependents * 0.02), 0.8)  # Dependents decrease tax by up to 20%
-        base_tax = predict_tax_liability(adjusted_data, model)
-        adjusted_tax_liability = base_tax * filing_adjustment * dependents_adjustment
-        st.subheader("Tax Prediction Results")
-        st.write("**Base Tax Liability**: $", round(base_tax, 2))
-        st.write("**Adjusted Tax Liability**: $", round(adjusted_tax_liability, 2))
-        st.info("Adjusted tax liability accounts for filing status and dependents.")
+        if any(value is None for value in adjusted_data.values()):
+            st.info("Enter the missing W-2 amounts above to see the tax prediction.")
+        else:
+            with metrics.timer("tax_model_load"):
+                tax_model = get_model()
+            with metrics.timer("tax_predict"):
+                base_tax = predict_tax_liability(adjusted_data, tax_model)
+            adjusted_tax_liability = base_tax * filing_adjustment * dependents_adjustment
+            st.subheader("Tax Prediction Results")
+            st.write("**Base Tax Liability**: $", round(base_tax, 2))
+            st.write("**Adjusted Tax Liability**: $", round(adjusted_tax_liability, 2))
+            st.info("Adjusted tax liability accounts for filing status and dependents.")
 
     else:
         st.error("Failed to extract data. Please ensure the PDF is clear and in a readable format.")
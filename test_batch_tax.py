@@ -0,0 +1,52 @@
+import pandas as pd
+import pytest
+
+from batch_tax import score_csv
+
+
+def write_csv(path, **columns):
+    pd.DataFrame(columns).to_csv(path, index=False)
+    return path
+
+
+def test_blank_optional_amounts_count_as_zero(tmp_path):
+    source = write_csv(
+        tmp_path / "in.csv",
+        annual_income=[80000, 80000, 80000],
+        tax_rate=[20, 20, 20],
+        rent=[None, 5000, 0],
+        other_tax_credits=[None, None, 1000],
+    )
+    score_csv(source, tmp_path / "out.csv", chunksize=2, bracket_year=2024)
+    out = pd.read_csv(tmp_path / "out.csv")
+    assert out["total_deductions"].tolist() == [0.0, 5000.0, 0.0]
+    assert out["estimated_tax_liability"].tolist() == [16000.0, 15000.0, 15000.0]
+    assert not out[["taxable_income", "progressive_tax", "marginal_rate", "effective_rate"]].isna().any().any()
+    assert out["marginal_rate"].iloc[0] == 0.22
+
+
+@pytest.mark.parametrize("column, value", [("annual_income", None), ("tax_rate", "n/a"), ("rent", "abc")])
+def test_bad_amounts_are_rejected_before_writing(tmp_path, column, value):
+    columns = {"annual_income": [50000, 60000, 70000], "tax_rate": [20, 20, 20], "rent": [0, 100, 200]}
+    columns[column][2] = value
+    source = write_csv(tmp_path / "in.csv", **columns)
+    output = tmp_path / "out.csv"
+    output.write_text("previous run")
+    with pytest.raises(ValueError, match=f"{column} on line 4"):
+        score_csv(source, output, chunksize=1)
+    assert output.read_text() == "previous run"
+    assert not list(tmp_path.glob("*.tmp"))
+
+
+def test_blank_filing_status_takes_default(tmp_path):
+    source = write_csv(tmp_path / "in.csv", annual_income=[90000, 90000], tax_rate=[20, 20], filing_status=["Single", None])
+    score_csv(source, tmp_path / "out.csv", bracket_year=2024, filing_status="Head of Household")
+    out = pd.read_csv(tmp_path / "out.csv")
+    assert out["progressive_tax"].iloc[0] > out["progressive_tax"].iloc[1]
+
+
+def test_unknown_filing_status_is_rejected(tmp_path):
+    source = write_csv(tmp_path / "in.csv", annual_income=[1000], tax_rate=[20], filing_status=["Married"])
+    with pytest.raises(ValueError, match="Unknown filing status 'Married'"):
+        score_csv(source, tmp_path / "out.csv", bracket_year=2024)
+    assert not (tmp_path / "out.csv").exists()
@@ -0,0 +1,80 @@
+from concurrent.futures import Future
+
+from context_window import ContextWindow, message_tokens
+
+
+# Runs each summary at once, so the window never has one in flight
+class InlineExecutor:
+    def submit(self, fn):
+        future = Future()
+        future.set_result(fn())
+        return future
+
+
+# Holds summaries until release(), like a slow summarizer
+class ManualExecutor:
+    def __init__(self):
+        self.queued = []
+
+    def submit(self, fn):
+        future = Future()
+        self.queued.append((future, fn))
+        return future
+
+    def release(self):
+        for future, fn in self.queued:
+            future.set_result(fn())
+        self.queued = []
+
+
+# The summary is the list of message ids it covers, so a test can check what was folded in
+def stub_summarizer(previous, messages):
+    return " ".join(filter(None, [previous, *(message["id"] for message in messages)]))
+
+
+def message(role, number):
+    return {"role": role, "id": f"m{number}", "content": f"m{number} " + "word " * 8}
+
+
+def covered(context):
+    ids = set()
+    for entry in context:
+        if entry["role"] == "system":
+            ids.update(entry["content"].split(": ", 1)[1].split())
+        else:
+            ids.add(entry["id"])
+    return ids
+
+
+def run_conversation(window, turns, after_build=None):
+    messages = []
+    for turn in range(turns):
+        messages.append(message("user", 2 * turn))
+        context = window.build(messages)
+        assert covered(context) == {entry["id"] for entry in messages}, f"turn {turn} lost a message"
+        if after_build:
+            after_build(context)
+        messages.append(message("assistant", 2 * turn + 1))
+        window.after_turn(messages)
+    return messages
+
+
+def test_every_message_is_sent_verbatim_or_summarized():
+    window = ContextWindow(stub_summarizer, budget=80, min_recent=2, reserve=26, executor=InlineExecutor())
+
+    def within_budget(context):
+        assert sum(message_tokens(entry) for entry in context) <= 80
+
+    run_conversation(window, 10, within_budget)
+    assert window.summarized > 0
+
+
+def test_unsummarized_turns_stay_verbatim_while_summary_is_in_flight():
+    executor = ManualExecutor()
+    window = ContextWindow(stub_summarizer, budget=40, min_recent=2, reserve=14, executor=executor)
+    messages = run_conversation(window, 4)
+    assert window.summarized == 0
+    executor.release()
+    context = window.build(messages)
+    assert window.summarized > 0
+    assert covered(context) == {entry["id"] for entry in messages}
@@ -0,0 +1,63 @@
+import numpy as np
+import pandas as pd
+from sklearn.linear_model import LinearRegression
+
+from income_model import FEATURES, TARGET, IncrementalLinearRegression, remember_income_model, row_values
+
+
+def make_frame(rows, seed=0):
+    rng = np.random.default_rng(seed)
+    X = rng.uniform(0, 20000, size=(rows, len(FEATURES)))
+    y = X @ np.array([0.8, -1.5, 2.0]) + 3000 + rng.normal(0, 500, rows)
+    return pd.DataFrame({**dict(zip(FEATURES, X.T)), TARGET: y})
+
+
+def assert_matches_refit(model, df):
+    reference = LinearRegression().fit(df[FEATURES].to_numpy(), df[TARGET].to_numpy())
+    probe = make_frame(5, seed=99)[FEATURES].to_numpy()
+    np.testing.assert_allclose(model.predict(probe), reference.predict(probe), rtol=1e-6, atol=1e-3)
+
+
+def test_from_frame_matches_sklearn():
+    df = make_frame(40)
+    assert_matches_refit(IncrementalLinearRegression.from_frame(df), df)
+
+
+def test_add_remove_cycles_match_refit():
+    df = make_frame(30, seed=1)
+    live = list(range(10))
+    model = IncrementalLinearRegression.from_frame(df.iloc[live])
+    for i in range(10, 30):
+        model.add(*row_values(df.iloc[i]))
+        live.append(i)
+        if i % 3 == 0:
+            model.remove(*row_values(df.iloc[live.pop(0)]))
+        assert_matches_refit(model, df.iloc[live])
+
+
+def test_fewer_rows_than_features_matches_refit():
+    df = make_frame(6, seed=2)
+    model = IncrementalLinearRegression.from_frame(df)
+    for _ in range(4):
+        model.remove(*row_values(df.iloc[-1]))
+        df = df.iloc[:-1]
+        assert_matches_refit(model, df)
+
+
+def test_copy_leaves_shared_model_unchanged():
+    df = make_frame(20, seed=3)
+    shared = IncrementalLinearRegression.from_frame(df)
+    before = shared.predict(df[FEATURES].to_numpy())
+    updated = shared.copy()
+    updated.remove(*row_values(df.iloc[0]))
+    np.testing.assert_allclose(shared.predict(df[FEATURES].to_numpy()), before)
+    assert_matches_refit(updated, df.iloc[1:])
+
+
+def test_remember_rebuilds_when_rows_changed_elsewhere():
+    df = make_frame(20, seed=4)
+    model = IncrementalLinearRegression.from_frame(df.iloc[:19])
+    # another session added the last row; the incremental model does not know about it
+    registered = remember_income_model("test.db", model, df, ("sig",))
+    assert registered is not model
+    assert_matches_refit(registered, df)
@@ -0,0 +1,77 @@
+import time
+
+import pytest
+
+from llm_backends import FakeBackend, Router
+from streaming import ManagedStream
+
+
+def timed_stream(router, **kwargs):
+    started = time.perf_counter()
+    chunks = list(router.stream([{"role": "user", "content": "hi"}], **kwargs))
+    return chunks, time.perf_counter() - started
+
+
+def test_slow_primary_is_hedged():
+    slow = FakeBackend("slow", chunks=["slow"], ttft=3.0)
+    fast = FakeBackend("fast", chunks=["fast"], ttft=0.05)
+    router = Router([slow, fast], default_hedge_delay=0.2)
+    chunks, elapsed = timed_stream(router)
+    assert chunks == ["fast"]
+    assert elapsed < 1.0
+    stats = router.stats()
+    assert stats["slow"]["hedged"] == 1
+    assert stats["fast"]["wins"] == 1
+
+
+def test_empty_first_chunk_does_not_win_the_hedge():
+    # A role-only first delta is not an answer; the router must still hedge
+    primary = FakeBackend("primary", chunks=["", "late"], ttft=0.0, chunk_delay=3.0)
+    backup = FakeBackend("backup", chunks=["quick"], ttft=0.1)
+    router = Router([primary, backup], default_hedge_delay=0.2)
+    chunks, elapsed = timed_stream(router)
+    assert chunks == ["quick"]
+    assert elapsed < 1.0
+
+
+def test_cancelled_loser_still_records_ttft():
+    slow = FakeBackend("slow", ttft=0.5)
+    fast = FakeBackend("fast", ttft=0.05)
+    router = Router([slow, fast], default_hedge_delay=0.1)
+    timed_stream(router)
+    time.sleep(0.6)
+    assert router.ttft["slow"].count == 1
+    assert router.ttft["fast"].count == 1
+
+
+def test_error_fails_over_to_next_backend():
+    broken = FakeBackend("broken", ttft=0.0, failure_rate=1.0)
+    backup = FakeBackend("backup", chunks=["ok"], ttft=0.0)
+    router = Router([broken, backup], default_hedge_delay=5.0)
+    chunks, elapsed = timed_stream(router)
+    assert chunks == ["ok"]
+    assert elapsed < 1.0
+    assert router.stats()["broken"]["errors"] == 1
+
+
+def test_all_backends_failing_raises_last_error():
+    router = Router([FakeBackend("a", ttft=0.0, failure_rate=1.0), FakeBackend("b", ttft=0.0, failure_rate=1.0)])
+    with pytest.raises(ConnectionError, match="b failed"):
+        timed_stream(router)
+
+
+def test_deadline_before_first_token_raises_timeout():
+    router = Router([FakeBackend("a", ttft=5.0), FakeBackend("b", ttft=5.0)], default_hedge_delay=0.1)
+    started = time.perf_counter()
+    with pytest.raises(TimeoutError):
+        timed_stream(router, timeout=0.3)
+    assert time.perf_counter() - started < 1.0
+
+
+def test_deadline_while_streaming_ends_managed_stream():
+    router = Router([FakeBackend("a", chunks=["first", "second"], ttft=0.0, chunk_delay=5.0), FakeBackend("b", ttft=5.0)])
+    stream = ManagedStream(lambda timeout: router.stream([], timeout=timeout), name=router.name, deadline=0.3)
+    started = time.perf_counter()
+    assert list(stream) == ["first"]
+    assert time.perf_counter() - started < 1.0
+    assert stream.metrics.status == "timeout"
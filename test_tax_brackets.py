@@ -0,0 +1,66 @@
+import numpy as np
+import pytest
+
+from tax_brackets import FILING_STATUSES, RATES, THRESHOLDS, compute_tax, compute_tax_by_status
+
+
+# The per-income loop the tax estimator used before the vectorized engine
+def loop_tax(income, thresholds):
+    brackets = list(zip([0, *thresholds], [*thresholds, np.inf], RATES))
+    tax = 0
+    for lower, upper, rate in brackets:
+        if income > lower:
+            taxable = min(upper, income) - lower
+            tax += taxable * rate
+        else:
+            break
+    return tax
+
+
+def random_incomes(size=100_000, seed=0):
+    rng = np.random.default_rng(seed)
+    incomes = rng.lognormal(11, 1.2, size)
+    # Exact bracket floors and zero, where an off-by-one in the lookup would show
+    floors = [floor for statuses in THRESHOLDS.values() for thresholds in statuses.values() for floor in thresholds]
+    incomes[: len(floors)] = floors
+    incomes[len(floors)] = 0.0
+    return incomes
+
+
+@pytest.mark.parametrize("year", sorted(THRESHOLDS))
+@pytest.mark.parametrize("status", FILING_STATUSES)
+def test_engine_matches_loop(year, status):
+    incomes = random_incomes()
+    expected = np.array([loop_tax(income, THRESHOLDS[year][status]) for income in incomes])
+    tax, marginal, effective = compute_tax(incomes, year, status)
+    np.testing.assert_allclose(tax, expected, rtol=1e-12, atol=1e-6)
+    assert np.all(np.isin(marginal, RATES))
+    np.testing.assert_allclose(effective[incomes > 0], expected[incomes > 0] / incomes[incomes > 0], rtol=1e-12)
+
+
+def test_scalar_returns_floats():
+    tax, marginal, effective = compute_tax(50000.0)
+    assert isinstance(tax, float) and isinstance(marginal, float) and isinstance(effective, float)
+    assert tax == pytest.approx(loop_tax(50000.0, THRESHOLDS[2021]["Single"]))
+    assert marginal == 0.22
+
+
+def test_by_status_matches_per_status():
+    incomes = random_incomes(1000, seed=1)
+    statuses = np.array(FILING_STATUSES)[np.arange(len(incomes)) % len(FILING_STATUSES)]
+    tax, _, _ = compute_tax_by_status(incomes, statuses, 2024)
+    for status in FILING_STATUSES:
+        mask = statuses == status
+        np.testing.assert_allclose(tax[mask], compute_tax(incomes[mask], 2024, status)[0])
+
+
+def test_unknown_status_is_rejected():
+    with pytest.raises(ValueError):
+        compute_tax_by_status([1000.0], ["Married"])
+
+
+def test_nan_income_gives_nan_results():
+    tax, marginal, effective = compute_tax(np.array([50000.0, np.nan]))
+    assert not np.isnan([tax[0], marginal[0], effective[0]]).any()
+    assert np.isnan([tax[1], marginal[1], effective[1]]).all()
+    assert all(np.isnan(value) for value in compute_tax(float("nan")))
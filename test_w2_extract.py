@@ -0,0 +1,133 @@
+from unittest import mock
+
+import pytest
+from PIL import Image
+
+import w2_extract
+from w2_extract import DIGITS_CONFIG, FIELDS, TEMPLATES, crop_regions, extract_w2, ocr_regions, parse_amount, parse_fields
+
+IRS_TEXT = """a Employee's social security number 123-45-6789
+1 Wages, tips, other compensation 2 Federal income tax withheld
+62,000.00 6,100.00
+3 Social security wages 4 Social security tax withheld
+62,000.00 3,844.00
+5 Medicare wages and tips 6 Medicare tax withheld
+62,000.00 899.00
+"""
+
+
+def test_side_by_side_labels_pair_by_column():
+    assert parse_fields(IRS_TEXT) == {
+        "wages": 62000.0,
+        "federal_tax_withheld": 6100.0,
+        "social_security_wages": 62000.0,
+        "medicare_wages": 62000.0,
+    }
+
+
+def test_unmatched_column_is_left_empty():
+    text = "1 Wages, tips, other compensation 2 Federal income tax withheld\n62,000.00\n"
+    values = parse_fields(text)
+    assert values["wages"] == 62000.0
+    assert values["federal_tax_withheld"] is None
+
+
+def test_label_patterns_still_read_inline_values():
+    values = parse_fields("Income: $45,000\nFederal tax: $3,000")
+    assert values["wages"] == 45000.0
+    assert values["federal_tax_withheld"] == 3000.0
+
+
+def test_parse_amount_ignores_box_numbers():
+    assert parse_amount("1") is None
+    assert parse_amount("2 62,000.00") == 62000.0
+    assert parse_amount("$6,100.00") == 6100.0
+
+
+def test_fields_missing_from_text_layer_are_left_empty_without_ocr():
+    text = IRS_TEXT.replace("62,000.00 6,100.00", "62,000.00")
+    rasterize = mock.Mock(side_effect=AssertionError("text-layer pages must not be rasterized"))
+    with mock.patch.object(w2_extract, "page_text", lambda pdf_data, page: text), mock.patch.object(w2_extract, "rasterize_page", rasterize):
+        values, method = w2_extract.extract_document(b"%PDF")
+    rasterize.assert_not_called()
+    assert values == dict(zip(FIELDS, [62000.0, None, 62000.0, 62000.0]))
+    assert method == "text_layer"
+
+
+def test_complete_text_layer_skips_ocr():
+    ocr = mock.Mock()
+    with mock.patch.object(w2_extract, "page_text", lambda pdf_data, page: IRS_TEXT), mock.patch.object(w2_extract, "extract_w2", ocr):
+        values, method = w2_extract.extract_document(b"%PDF")
+    ocr.assert_not_called()
+    assert method == "text_layer"
+
+
+# A grayscale page with each irs_w2 box filled in its own shade, so a stub engine can tell
+# which box it was handed and that the crop stayed inside it
+SHADES = dict(zip(FIELDS, (40, 80, 120, 160)))
+BOX_TEXT = {40: "1 62,000.00", 80: "6100.00", 120: "62000.00", 160: "$62,000.00"}
+
+
+def irs_page(dpi=150):
+    page = Image.new("L", (round(8.5 * dpi), round(11 * dpi)), 255)
+    width, height = page.size
+    for field, (left, top, right, bottom) in TEMPLATES["irs_w2"].items():
+        page.paste(SHADES[field], (round(left * width), round(top * height), round(right * width), round(bottom * height)))
+    return page
+
+
+def stub_engine(read=BOX_TEXT):
+    def image_to_string(image, lang="eng", config=""):
+        assert config == DIGITS_CONFIG
+        shades = {shade for _, shade in image.getcolors()}
+        assert len(shades) == 1, "crop spills outside its box"
+        return read.get(shades.pop(), "")
+    return image_to_string
+
+
+@pytest.mark.parametrize("dpi", [100, 150, 300])
+def test_crop_regions_cover_each_box_at_any_dpi(dpi):
+    crops = crop_regions(irs_page(dpi), TEMPLATES["irs_w2"])
+    assert set(crops) == set(FIELDS)
+    for field, crop in crops.items():
+        assert crop.getcolors() == [(crop.width * crop.height, SHADES[field])]
+        # Tall enough for a line of 10 pt digits (about 0.14 in)
+        assert crop.height >= dpi * 0.15
+
+
+def test_ocr_regions_parses_each_box():
+    crops = crop_regions(irs_page(), TEMPLATES["irs_w2"])
+    with mock.patch.object(w2_extract, "image_to_string", stub_engine()):
+        assert ocr_regions(crops) == dict.fromkeys(FIELDS, 62000.0) | {"federal_tax_withheld": 6100.0}
+
+
+def test_extract_w2_reads_only_the_boxes():
+    full_page = mock.Mock(side_effect=AssertionError("every box was readable"))
+    with mock.patch.object(w2_extract, "rasterize_page", lambda pdf_data, dpi, page=1, gray=True: irs_page(dpi)), \
+            mock.patch.object(w2_extract, "image_to_string", stub_engine()), \
+            mock.patch.object(w2_extract, "extract_full_page", full_page):
+        values, method = extract_w2(b"%PDF", "irs_w2")
+    assert method == "roi"
+    assert values == {"wages": 62000.0, "federal_tax_withheld": 6100.0, "social_security_wages": 62000.0, "medicare_wages": 62000.0}
+
+
+def test_extract_w2_falls_back_for_an_unreadable_box():
+    # The withholding box reads back only its box number
+    read = {**BOX_TEXT, SHADES["federal_tax_withheld"]: "2"}
+    full_page = mock.Mock(return_value={"federal_tax_withheld": 6100.0})
+    with mock.patch.object(w2_extract, "rasterize_page", lambda pdf_data, dpi, page=1, gray=True: irs_page(dpi)), \
+            mock.patch.object(w2_extract, "image_to_string", stub_engine(read)), \
+            mock.patch.object(w2_extract, "extract_full_page", full_page):
+        values, method = extract_w2(b"%PDF", "irs_w2")
+    assert method == "roi+full_page"
+    assert full_page.call_args.kwargs["fields"] == ["federal_tax_withheld"]
+    assert values["federal_tax_withheld"] == 6100.0
+
+
+def test_extract_w2_without_template_reads_the_full_page():
+    full_page = mock.Mock(return_value=dict.fromkeys(FIELDS, 1000.0))
+    with mock.patch.object(w2_extract, "rasterize_page", mock.Mock(side_effect=AssertionError("no boxes to crop"))), \
+            mock.patch.object(w2_extract, "extract_full_page", full_page):
+        values, method = extract_w2(b"%PDF", None)
+    assert method == "full_page"
+    assert values == dict.fromkeys(FIELDS, 1000.0)
@@ -0,0 +1,114 @@
+import os
+import sqlite3
+import sys
+import threading
+
+import yaml
+from yaml.loader import SafeLoader
+
+import sqlite_store
+
+USER_STORE_FILE = "users.db"
+LEGACY_YAML = "db.yaml"
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS users (
+    username TEXT PRIMARY KEY,
+    name TEXT NOT NULL,
+    email TEXT NOT NULL,
+    password TEXT NOT NULL
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS meta (
+    key TEXT PRIMARY KEY,
+    value TEXT
+);
+"""
+
+_cache = {}
+_cache_lock = threading.Lock()
+
+
+def connect(path=USER_STORE_FILE):
+    return sqlite_store.connect(path, SCHEMA)
+
+
+def transaction(path=USER_STORE_FILE):
+    return sqlite_store.transaction(path, SCHEMA)
+
+
+def import_yaml(conn, yaml_path):
+    with open(yaml_path) as file:
+        config = yaml.load(file, Loader=SafeLoader) or {}
+    users = (config.get("usernames") or {}).items()
+    conn.executemany(
+        "INSERT OR IGNORE INTO users VALUES (?, ?, ?, ?)",
+        [(username, str(user.get("name", "")), str(user.get("email", "")), user["password"]) for username, user in users],
+    )
+    return len(users)
+
+
+# One-time import of the existing usernames: layout from db.yaml
+def init_user_store(path=USER_STORE_FILE, legacy_yaml=LEGACY_YAML):
+    conn = connect(path)
+    try:
+        if conn.execute("SELECT 1 FROM meta WHERE key = 'initialized'").fetchone():
+            return
+    finally:
+        conn.close()
+    with transaction(path) as conn:
+        if conn.execute("SELECT 1 FROM meta WHERE key = 'initialized'").fetchone():
+            return
+        if legacy_yaml and os.path.exists(legacy_yaml):
+            import_yaml(conn, legacy_yaml)
+        conn.execute("INSERT INTO meta VALUES ('initialized', ?)", (legacy_yaml or "",))
+
+
+def get_user(username, path=USER_STORE_FILE):
+    conn = connect(path)
+    try:
+        row = conn.execute("SELECT name, email, password FROM users WHERE username = ?", (username,)).fetchone()
+    finally:
+        conn.close()
+    return dict(zip(("name", "email", "password"), row)) if row else None
+
+
+# The primary key makes the existence check and the insert one atomic step
+def add_user(username, name, email, password_hash, path=USER_STORE_FILE):
+    try:
+        with transaction(path) as conn:
+            conn.execute("INSERT INTO users VALUES (?, ?, ?, ?)", (username, name, email, password_hash))
+    except sqlite3.IntegrityError:
+        return False
+    with _cache_lock:
+        _cache.pop(path, None)
+    return True
+
+
+# Credentials in the shape streamlit_authenticator expects, read once per process and
+# re-read only after a write here or a change to the store file from another process
+def load_credentials(path=USER_STORE_FILE):
+    signature = sqlite_store.store_signature(path)
+    with _cache_lock:
+        cached = _cache.get(path)
+    if cached is None or cached[0] != signature:
+        conn = connect(path)
+        try:
+            rows = conn.execute("SELECT username, name, email, password FROM users").fetchall()
+        finally:
+            conn.close()
+        users = {username: {"name": name, "email": email, "password": password} for username, name, email, password in rows}
+        cached = (signature, users)
+        with _cache_lock:
+            _cache[path] = cached
+    # The authenticator writes login state into the records, so each caller gets its own copy
+    return {"usernames": {username: dict(user) for username, user in cached[1].items()}}
+
+
+if __name__ == "__main__":
+    if len(sys.argv) >= 3 and sys.argv[1] == "import":
+        with transaction() as conn:
+            count = import_yaml(conn, sys.argv[2])
+            conn.execute("INSERT OR REPLACE INTO meta VALUES ('initialized', ?)", (sys.argv[2],))
+        print(f"Imported {count} users from {sys.argv[2]} into {USER_STORE_FILE}")
+    else:
+        print("usage: python user_store.py import <db.yaml>")
@@ -0,0 +1,240 @@
+import io
+import os
+import re
+import subprocess
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from lazy_imports import lazy_import
+from ocr_engine import image_to_string
+
+pypdf = lazy_import("pypdf")
+Image = lazy_import("PIL.Image")
+
+FIELDS = ["wages", "federal_tax_withheld", "social_security_wages", "medicare_wages"]
+
+# Box values are printed at 9-12 pt; 150 DPI puts digits at the 20-30 px height tesseract
+# reads best, with under half the pixels of 200 DPI
+ROI_DPI = int(os.environ.get("OCR_ROI_DPI", 150))
+FULL_PAGE_DPI = 200
+
+# One line of digits per crop
+DIGITS_CONFIG = "--psm 7 -c tessedit_char_whitelist=0123456789$,."
+
+# Value areas as (left, top, right, bottom) fractions of the page, so they hold at any DPI.
+# irs_w2 follows the IRS Copy B/C/2 layout; payroll providers that print their own forms
+# need their own entry. sample_report maps the one W-2 figure on temp_w2.pdf.
+# Check a template against a real scan with
+#   python bench_ocr.py scan.pdf --template irs_w2 --expect wages=... --save-crops crops/
+# which fails on any box that does not read back its expected amount.
+TEMPLATES = {
+    "irs_w2": {
+        "wages": (0.51, 0.095, 0.72, 0.115),
+        "federal_tax_withheld": (0.73, 0.095, 0.95, 0.115),
+        "social_security_wages": (0.51, 0.127, 0.72, 0.145),
+        "medicare_wages": (0.51, 0.158, 0.72, 0.176),
+    },
+    "sample_report": {
+        "wages": (0.185, 0.165, 0.32, 0.186),
+    },
+}
+DEFAULT_TEMPLATE = os.environ.get("W2_TEMPLATE", "irs_w2") or None
+
+# A dollar amount as it appears next to a label: grouped thousands, cents, or at least three
+# digits, so box numbers ("4 Social security tax withheld") are never taken for values
+MONEY = r"\$?\s*(\d{1,3}(?:,\d{3})+(?:\.\d{2})?|\d+\.\d{2}|\d{3,})"
+
+# IRS box labels for the fields read off the form
+LABELS = {
+    "wages": r"Wages,?\s+tips,?\s+other\s+comp(?:ensation)?",
+    "federal_tax_withheld": r"Federal\s+income\s+tax\s+withheld",
+    "social_security_wages": r"Social\s+security\s+wages",
+    "medicare_wages": r"Medicare\s+wages(?:\s+and\s+tips)?",
+}
+
+# Compiled once and shared by the text-layer and full-page OCR paths. Each field tries the IRS
+# box label first (nearest amount within a short window, across line breaks), then the
+# "Label ... $amount" patterns the page has always used.
+FIELD_PATTERNS = {
+    "wages": [
+        re.compile(LABELS["wages"] + ".{0,60}?" + MONEY, re.I | re.S),
+        re.compile(r"Income.*\$(\d{1,3}(?:,\d{3})*(?:\.\d{2})?)"),
+    ],
+    "federal_tax_withheld": [
+        re.compile(LABELS["federal_tax_withheld"] + ".{0,60}?" + MONEY, re.I | re.S),
+        re.compile(r"Federal.*\$(\d{1,3}(?:,\d{3})*(?:\.\d{2})?)"),
+    ],
+    "social_security_wages": [
+        re.compile(LABELS["social_security_wages"] + ".{0,60}?" + MONEY, re.I | re.S),
+    ],
+    "medicare_wages": [
+        re.compile(LABELS["medicare_wages"] + ".{0,60}?" + MONEY, re.I | re.S),
+    ],
+}
+
+# Every label that shares a row with one of the fields on the IRS form (boxes 1-6, two to a
+# row), so a field's column can be counted on a row that also holds a box we do not read
+COLUMN_LABELS = re.compile("|".join(
+    f"(?P<{field}>{label})" for field, label in {
+        **LABELS,
+        "social_security_tax": r"Social\s+security\s+tax\s+withheld",
+        "medicare_tax": r"Medicare\s+tax\s+withheld",
+    }.items()
+), re.I)
+MONEY_PATTERN = re.compile(MONEY)
+
+# Fewer visible characters than this means a scan with at most a stamped header
+MIN_TEXT_CHARS = 40
+
+_executor = None
+_executor_lock = threading.Lock()
+
+
+def _ocr_executor():
+    global _executor
+    if _executor is None:
+        with _executor_lock:
+            if _executor is None:
+                _executor = ThreadPoolExecutor(max_workers=min(4, os.cpu_count() or 1), thread_name_prefix="ocr")
+    return _executor
+
+
+# Feed the PDF to pdftoppm on stdin ("-") and read the page back from stdout, so the
+# upload never touches disk and concurrent sessions cannot collide on a shared file.
+# -gray writes an 8-bit PGM, a third of the pixels tesseract would otherwise convert.
+def rasterize_page(pdf_data, dpi, page=1, gray=True):
+    command = ["pdftoppm", "-r", str(dpi), "-f", str(page), "-l", str(page)]
+    if gray:
+        command.append("-gray")
+    result = subprocess.run(command + ["-"], input=pdf_data, capture_output=True, check=True)
+    return Image.open(io.BytesIO(result.stdout))
+
+
+# Largest amount in an OCR'd box; None when the box holds nothing shaped like money. A crop
+# that catches the box number ("1", "2") next to the value must not turn it into the amount.
+def parse_amount(text):
+    amounts = [match.group(1).replace(",", "") for match in MONEY_PATTERN.finditer(text)]
+    if not amounts:
+        return None
+    return max(float(amount) for amount in amounts)
+
+
+def crop_regions(image, template):
+    width, height = image.size
+    return {
+        field: image.crop((round(left * width), round(top * height), round(right * width), round(bottom * height)))
+        for field, (left, top, right, bottom) in template.items()
+    }
+
+
+# Each crop is its own recognition; they are independent, so they run concurrently on the
+# warm engine pool
+def ocr_regions(crops, lang="eng", config=DIGITS_CONFIG):
+    futures = {
+        field: _ocr_executor().submit(image_to_string, crop, lang=lang, config=config)
+        for field, crop in crops.items()
+    }
+    return {field: parse_amount(future.result()) for field, future in futures.items()}
+
+
+# Fields whose labels sit side by side on one line with their values on the next line, as the
+# IRS form prints boxes 1 and 2: the nth label takes the nth amount. Rows whose amount count
+# does not match their label count are left to the label patterns. Returns
+# {field: (value, span of the amount in text)}.
+def parse_columns(text, fields=FIELDS):
+    lines = []
+    offset = 0
+    for line in text.splitlines(keepends=True):
+        if line.strip():
+            lines.append((offset, line))
+        offset += len(line)
+    found = {}
+    for (_, line), (start, next_line) in zip(lines, lines[1:]):
+        labels = [match.lastgroup for match in COLUMN_LABELS.finditer(line)]
+        if len(labels) < 2 or MONEY_PATTERN.search(line):
+            continue
+        amounts = list(MONEY_PATTERN.finditer(next_line))
+        if len(amounts) != len(labels):
+            continue
+        for field, amount in zip(labels, amounts):
+            if field in fields and field not in found:
+                span = (start + amount.start(1), start + amount.end(1))
+                found[field] = (float(amount.group(1).replace(",", "")), span)
+    return found
+
+
+# Each amount in the text belongs to at most one field. Side-by-side labels are paired with
+# their values by column first; any other field takes the nearest amount after its label
+# that no field has claimed yet, or is left empty for the user to fill rather than given
+# the wrong number.
+def parse_fields(text, fields=FIELDS):
+    columns = parse_columns(text, fields)
+    values = {field: value for field, (value, _) in columns.items()}
+    claimed = {span for _, span in columns.values()}
+    for field in fields:
+        if field in values:
+            continue
+        values[field] = None
+        for pattern in FIELD_PATTERNS[field]:
+            match = next((m for m in pattern.finditer(text) if m.span(1) not in claimed), None)
+            if match:
+                claimed.add(match.span(1))
+                values[field] = float(match.group(1).replace(",", ""))
+                break
+    return {field: values[field] for field in fields}
+
+
+def extract_full_page(pdf_data, dpi=FULL_PAGE_DPI, page=1, lang="eng", gray=True, fields=FIELDS):
+    text = image_to_string(rasterize_page(pdf_data, dpi, page, gray), lang=lang)
+    return parse_fields(text, fields)
+
+
+# Text the PDF itself carries for the page, or "" when it has none (scans) or cannot be parsed
+def page_text(pdf_data, page=1):
+    try:
+        reader = pypdf.PdfReader(io.BytesIO(pdf_data))
+        if page > len(reader.pages):
+            return ""
+        return reader.pages[page - 1].extract_text() or ""
+    except pypdf.errors.PdfReadError:
+        return ""
+
+
+# Values from the text layer, None for fields it does not show; None altogether when the
+# page has no usable text and needs OCR
+def extract_text_layer(pdf_data, page=1):
+    text = page_text(pdf_data, page)
+    if sum(not char.isspace() for char in text) < MIN_TEXT_CHARS:
+        return None
+    values = parse_fields(text)
+    if all(value is None for value in values.values()):
+        return None
+    return values
+
+
+# OCR only the template's boxes; fields the template lacks or could not read are looked up on
+# a full-page pass, which is all that runs when template is None. Returns the four W-2
+# amounts (0.0 when not found) and the path taken: "roi", "roi+full_page" or "full_page".
+def extract_w2(pdf_data, template=DEFAULT_TEMPLATE, dpi=ROI_DPI, page=1, lang="eng", fallback=True):
+    boxes = TEMPLATES[template] if template else {}
+    values = dict.fromkeys(FIELDS)
+    if boxes:
+        values.update(ocr_regions(crop_regions(rasterize_page(pdf_data, dpi, page), boxes), lang))
+    method = "roi" if boxes else "full_page"
+    missing = [field for field in FIELDS if values[field] is None]
+    if missing and fallback:
+        found = extract_full_page(pdf_data, FULL_PAGE_DPI, page, lang, fields=missing)
+        values.update({field: value for field, value in found.items() if value is not None})
+        method = "roi+full_page" if boxes else "full_page"
+    return {field: values[field] or 0.0 for field in FIELDS}, method
+
+
+# Generated PDFs are read from their text layer, which is both faster and exact; only pages
+# without usable text are rasterized. A text layer that lacks some fields is not OCR'd on top:
+# those fields come back as None for the user to fill in. Returns the values and the path
+# taken: "text_layer" or one of the OCR paths from extract_w2.
+def extract_document(pdf_data, template=DEFAULT_TEMPLATE, dpi=ROI_DPI, page=1, lang="eng"):
+    values = extract_text_layer(pdf_data, page)
+    if values is not None:
+        return values, "text_layer"
+    return extract_w2(pdf_data, template, dpi, page, lang)